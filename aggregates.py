@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import CACHE_DIR
+
+# Agregat katalog yang dihitung saat ingest dan diperbarui per tahun saat upsert store.
+# Satu tabel kecil (tahun x bulan x kelas magnitudo x kelas kedalaman) berisi jumlah
+# kejadian dan nilai min/maks; panel statistik membaca tabel ini, bukan katalog.
+# Kelas = indeks np.searchsorted pada batas: M <3, 3-4, ..., >=7; kedalaman <70, 70-300, >=300 km
+MAG_BAND_EDGES = [3, 4, 5, 6, 7]
+DEPTH_BAND_EDGES = [70, 300]
+
+KEYS = ['year', 'month', 'mag_band', 'depth_band']
+RANGE_COLUMNS = ['mag', 'depth', 'latitude', 'longitude']
+
+
+def band_codes(values, edges):
+    # Indeks kelas per nilai, -1 untuk NaN
+    values = np.asarray(values, dtype=float)
+    codes = np.searchsorted(edges, values, side='right').astype(np.int8)
+    codes[np.isnan(values)] = -1
+    return codes
+
+
+def build_table(gdf):
+    frame = pd.DataFrame({
+        'year': gdf['year'].to_numpy(),
+        'month': gdf['month'].to_numpy(),
+        'mag_band': band_codes(gdf['mag'], MAG_BAND_EDGES),
+        'depth_band': band_codes(gdf['depth'], DEPTH_BAND_EDGES),
+        **{col: gdf[col].to_numpy(dtype=float) for col in RANGE_COLUMNS},
+    })
+    aggs = {'count': ('mag', 'size')}
+    for col in RANGE_COLUMNS:
+        aggs[f'{col}_min'] = (col, 'min')
+        aggs[f'{col}_max'] = (col, 'max')
+    return frame.groupby(KEYS, sort=True).agg(**aggs).reset_index()
+
+
+def aggregates_path(path):
+    # Store: di dalam folder store; katalog statis: di samping cache Parquet-nya
+    if os.path.isdir(path):
+        return os.path.join(path, 'aggregates.parquet')
+    return os.path.join(CACHE_DIR, os.path.basename(path) + '.agg.parquet')
+
+
+def update_table(table, parts):
+    # Ganti baris tahun yang berubah; parts = {tahun: isi partisi baru (boleh kosong)}
+    kept = table[~table['year'].isin(list(parts))] if table is not None else None
+    fresh = [build_table(part) for part in parts.values() if len(part)]
+    frames = [f for f in [kept, *fresh] if f is not None and len(f)]
+    if not frames:
+        return build_table(pd.DataFrame({'year': [], 'month': [], **{c: [] for c in RANGE_COLUMNS}}))
+    return pd.concat(frames, ignore_index=True).sort_values(KEYS, ignore_index=True)
+
+
+class Aggregates:
+    # Tampilan siap pakai atas tabel agregat; semua operasi hanya menyentuh tabel kecil
+
+    def __init__(self, table):
+        self.table = table
+
+    def total(self):
+        return int(self.table['count'].sum())
+
+    def per_year(self):
+        return self.table.groupby('year')['count'].sum()
+
+    def recent(self, n_years=5):
+        # Jumlah kejadian pada n tahun terakhir katalog -> (jumlah, tahun awal, tahun akhir)
+        if self.table.empty:
+            return 0, None, None
+        last = int(self.table['year'].max())
+        first = last - n_years + 1
+        return int(self.table.loc[self.table['year'] >= first, 'count'].sum()), first, last
+
+    def max_mag(self, by='year'):
+        # Magnitudo terbesar per tahun atau per (tahun, bulan)
+        keys = ['year'] if by == 'year' else ['year', 'month']
+        return self.table.groupby(keys)['mag_max'].max()
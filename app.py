@@ -1,16 +1,29 @@
 import streamlit as st
 import pandas as pd
-import geopandas as gpd
-import json
-import matplotlib.pyplot as plt
+import numpy as np
 import folium
 import base64
-from folium.plugins import Fullscreen, MiniMap
-from folium.plugins import Draw
 from streamlit_folium import st_folium
-from datetime import datetime
-import io
-from PIL import Image
+from aggregates import RANGE_COLUMNS, Aggregates, build_table
+from catalog import catalog_version, load_aggregates, load_catalog
+from sources import format_time
+from maps import (
+    EVENT_LAYER_CACHE_SIZE, BaseMap, EventLayerCache, create_base_map, create_bvalue_layer,
+    create_density_layer, create_event_layer, create_playback_layer, filter_hash, overlay_kind,
+    viewport_from_state
+)
+from map_layers import DENSITY_DECADES
+from tiles import MAX_TILE_FEATURES, TILE_PORT, start_tile_server
+from areas import AREA_LAYERS, area_stats, available_layers
+from faults import FAULT_DISTANCE_COLUMNS
+from decluster import KIND_LABELS, load_declustering
+from filters import FilterEngine, filter_events, viewport_box, viewport_limit, viewport_rows
+from regions import DEFAULT_REGION, MAX_RESIDENT_REGIONS, REGIONS
+from store import region_catalog
+from bvalue import GRID_MIN_EVENTS, GRID_RADIUS_KM, GRID_STEP, MIN_EVENTS, b_value_grid, gr_stats
+from density import BANDWIDTH_KM, DENSITY_CELL, DENSITY_WEIGHTS, density_grid, event_energy
+from playback import DEFAULT_UNIT, PLAYBACK_UNITS, Playback, register_playback
+from metrics import RerunMetrics, map_payload_bytes, new_history, recent_reruns
 
 # Set page
 st.set_page_config(
@@ -101,21 +114,77 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Pilih wilayah; katalog wilayah baru dimuat saat dipilih
+region_key = st.sidebar.selectbox(
+    "Wilayah",
+    options=list(REGIONS),
+    index=list(REGIONS).index(DEFAULT_REGION),
+    format_func=lambda key: REGIONS[key]['name']
+)
+region = REGIONS[region_key]
+
+# Waktu tiap tahap rerun dicatat ke data/cache/metrics (lihat metrics.py)
+rerun_metrics = RerunMetrics(st.session_state.setdefault('rerun_history', new_history()), region=region_key)
+
 # Data
-@st.cache_data
-def load_data():
-    gdf = gpd.read_file("./data/indo.geojson")
-    gdf['mag'] = pd.to_numeric(gdf['mag'], errors='coerce')
-    gdf['depth'] = pd.to_numeric(gdf['depth'], errors='coerce')
-    gdf['time'] = gdf['time'].apply(str)
-    gdf['time'] = pd.to_datetime(gdf['time'], utc=True)
-    gdf['time_wib'] = gdf['time'].dt.tz_convert('Asia/Jakarta')
-    gdf['time'] = gdf['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-    gdf['time_wib'] = gdf['time_wib'].dt.strftime('%Y-%m-%d %H:%M:%S')
-    gdf['year'] = pd.to_datetime(gdf['time_wib']).dt.year
-    return gdf
-
-gdf = load_data()
+# Store hasil sinkronisasi FDSN dipakai jika ada; versi katalog jadi kunci cache
+# sehingga data baru langsung terbaca tanpa restart
+catalog_path = region_catalog(region_key)
+data_version = catalog_version(catalog_path)
+
+# Hanya beberapa wilayah yang disimpan di memori, sisanya dimuat ulang dari cache Parquet
+@st.cache_data(max_entries=MAX_RESIDENT_REGIONS)
+def load_data(path, version):
+    return load_catalog(path)
+
+# Partisi tahun, indeks magnitudo/kedalaman dan indeks spasial dibangun sekali per versi
+@st.cache_resource(max_entries=MAX_RESIDENT_REGIONS)
+def load_filter_engine(path, version):
+    return FilterEngine(load_data(path, version))
+
+# Agregat per tahun/bulan/kelas magnitudo/kedalaman untuk panel statistik (lihat aggregates.py)
+@st.cache_resource(max_entries=MAX_RESIDENT_REGIONS)
+def load_stats(path, version):
+    return load_aggregates(path)
+
+# Label declustering (gempa utama/pendahuluan/susulan), disimpan per versi katalog (lihat decluster.py)
+@st.cache_resource(max_entries=MAX_RESIDENT_REGIONS)
+def load_labels(path, version):
+    return load_declustering(path, load_data(path, version))
+
+# Agregat gempa utama saja, supaya grafik dan kotak statistik menghitung kejadian yang sama
+# saat "Hanya gempa utama" dicentang
+@st.cache_resource(max_entries=MAX_RESIDENT_REGIONS)
+def load_mainshock_stats(path, version):
+    mainshock = (load_labels(path, version)['kind'] == 'mainshock').to_numpy()
+    return Aggregates(build_table(load_data(path, version).loc[mainshock, ['year', 'month', *RANGE_COLUMNS]]))
+
+# Relasi magnitudo-frekuensi dan grid b-value per kombinasi filter (lihat bvalue.py).
+# Kuncinya hash filter; argumen berawalan _ tidak ikut di-hash Streamlit.
+@st.cache_data(max_entries=EVENT_LAYER_CACHE_SIZE)
+def load_gr_stats(key, _mag):
+    return gr_stats(_mag)
+
+@st.cache_data(max_entries=EVENT_LAYER_CACHE_SIZE)
+def load_bvalue_grid(key, _engine, _rows, bounds):
+    return b_value_grid(_engine.index, _rows, _engine.mag, bounds)
+
+# Grid kepadatan per kombinasi filter dan bobot (lihat density.py)
+@st.cache_data(max_entries=EVENT_LAYER_CACHE_SIZE)
+def load_density_grid(key, _engine, _rows, bounds, weight):
+    weights = event_energy(_engine.mag[_rows]) if weight == 'energy' else None
+    return density_grid(_engine.index.lon[_rows], _engine.index.lat[_rows], bounds, weights)
+
+with rerun_metrics.stage('load') as stage:
+    gdf = load_data(catalog_path, data_version)
+    stage['rows'] = len(gdf)
+with rerun_metrics.stage('filter_index'):
+    filter_engine = load_filter_engine(catalog_path, data_version)
+with rerun_metrics.stage('stats'):
+    stats = load_stats(catalog_path, data_version)
+with rerun_metrics.stage('decluster'):
+    labels = load_labels(catalog_path, data_version)
+    mainshock = (labels['kind'] == 'mainshock').to_numpy()
 
 # Header
 def get_image_as_base64(path):
@@ -262,8 +331,12 @@ with col_stats:
         ">Jumlah Gempa per Tahun</h5>
     """, unsafe_allow_html=True)
     
-    # Hitung statistik
-    gempa_per_tahun = gdf['year'].value_counts().sort_index()
+    # Gempa pendahuluan/susulan tidak dihitung di grafik, peta dan tabel
+    mainshock_only = st.checkbox("Hanya gempa utama (declustering Gardner-Knopoff)", value=False)
+
+    # Statistik dari tabel agregat, bukan dari katalog; gempa utama saja dari label declustering
+    panel_stats = load_mainshock_stats(catalog_path, data_version) if mainshock_only else stats
+    gempa_per_tahun = panel_stats.per_year()
     
     # Buat barchart dengan tinggi yang disesuaikan
     chart_data = gempa_per_tahun.reset_index()
@@ -279,6 +352,9 @@ with col_stats:
     st.markdown("</div>", unsafe_allow_html=True)
     
     # Metric box
+    recent_count, recent_first, recent_last = panel_stats.recent(5)
+    recent_max = panel_stats.max_mag().loc[recent_first:].max()
+    total_title = "Total Gempa Utama" if mainshock_only else "Total Kejadian"
     st.markdown(f"""
     <style>
         .side-metric {{
@@ -306,12 +382,19 @@ with col_stats:
     </style>
     
     <div class="side-metric">
-        <div class="side-title">Total Kejadian</div>
-        <div class="side-value">{len(gdf):,}</div>
-        <div class="side-subtext">5 tahun terakhir</div>
+        <div class="side-title">{total_title}</div>
+        <div class="side-value">{panel_stats.total():,}</div>
+        <div class="side-subtext">{recent_count:,} dalam 5 tahun terakhir ({recent_first}-{recent_last})</div>
+    </div>
+    <div class="side-metric">
+        <div class="side-title">Magnitudo Terbesar ({recent_first}-{recent_last})</div>
+        <div class="side-value">M {recent_max:.1f}</div>
     </div>
     """, unsafe_allow_html=True)
 
+    # Diisi setelah filter diterapkan (b-value katalog hasil filter)
+    bvalue_panel = st.container()
+
     st.markdown("</div>", unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -364,148 +447,245 @@ with st.expander("Filter Data", expanded=False):
             step=0.1
         )
 
-# Apply filters
-filtered_gdf = gdf[
-    (gdf['year'] == year_filter) &
-    (gdf['mag'] >= mag_range[0]) & 
-    (gdf['mag'] <= mag_range[1]) &
-    (gdf['depth'] >= depth_range[0]) & 
-    (gdf['depth'] <= depth_range[1]) &
-    (gdf['latitude'] >= lat_range[0]) & 
-    (gdf['latitude'] <= lat_range[1]) &
-    (gdf['longitude'] >= lon_range[0]) &  
-    (gdf['longitude'] <= lon_range[1])
-]
-
-# Membuat Peta
-def create_map(data):
-    m = folium.Map(
-        location=[-2.54, 110.7126], 
-        zoom_start=6) 
-
-    # Tambahkan beberapa base map
-    tiles = {
-        'Satelit (Esri World Imagery)': 'https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
-        'Topografi (Esri World Topo)': 'https://server.arcgisonline.com/ArcGIS/rest/services/World_Topo_Map/MapServer/tile/{z}/{y}/{x}'
+    # Jarak ke patahan/megathrust terdekat, dihitung saat katalog dimuat (lihat faults.py)
+    st.subheader("Filter Jarak ke Sumber Gempa")
+    col_fault, col_km = st.columns(2)
+    fault_labels = {
+        'semua': "Semua kejadian",
+        'terdekat': "Patahan atau megathrust",
+        'patahan': "Patahan",
+        'megathrust': "Megathrust",
     }
-    
-    for name, url in tiles.items():
-        folium.TileLayer(url, attr=name, name=name).add_to(m)
-
-# Tambahkan layer megathrust dari shapefile
-    try:
-        megathrust = gpd.read_file("./data/megathrust/megathrust.shp")
-        folium.GeoJson(
-        megathrust.to_json(),
-        name='Zona Megathrust',
-        style_function=lambda x: {
-        'color': 'red',
-        'weight': 3,
-        'fillOpacity': 0.1
-    },
-    tooltip=folium.GeoJsonTooltip(
-        fields=['Name'],
-        aliases=['Nama Zona: '],
-        localize=True
-    )
-).add_to(m)
-    except Exception as e:
-        st.warning(f"Tidak dapat memuat data megathrust: {e}")
-
-    # Tambahkan layer patahan
-    try:
-        patahan = gpd.read_file("./data/patahan/patahan.shp")
-        folium.GeoJson(
-        patahan.to_json(),
-        name='Zona Patahan',
-        style_function=lambda x: {
-        'color': 'blue',
-        'weight': 2,
-        'dashArray': '5, 5',
-        'fillOpacity': 0.1
-    },
-    tooltip=folium.GeoJsonTooltip(
-        fields=['Name'],
-        aliases=['Nama Patahan: '],
-        localize=True
-    )
-).add_to(m)
-    except Exception as e:
-        st.warning(f"Tidak dapat memuat data patahan: {e}")
 
-    # Layer Control
-    folium.LayerControl().add_to(m)
+    with col_fault:
+        fault_kind = st.selectbox(
+            "Jarak ke",
+            options=list(fault_labels),
+            format_func=fault_labels.get
+        )
 
-    # Add fullscreen control
-    Fullscreen().add_to(m)
-    
-    # Add minimap
-    MiniMap().add_to(m)
-    
-    # Create color gradient for depth
-    cmap = plt.get_cmap('gist_rainbow')
-    norm = plt.Normalize(20, 100)
-    
-    for _, eq in data.iterrows():
-        # Determine marker color based on depth
-        rgba = cmap(norm(eq['depth']))
-        color = f'#{int(rgba[0]*255):02x}{int(rgba[1]*255):02x}{int(rgba[2]*255):02x}'
-        
-        # Scale marker size based on magnitude
-        min_size = 5
-        max_size = 20
-        scale = ((eq['mag'] - gdf['mag'].min()) / (gdf['mag'].max() - gdf['mag'].min()))
-        size = int(min_size + (max_size - min_size) * scale)
-        
-        # Popup
-        popup_content = f"""
-        <div style="font-family:Arial, sans-serif; font-size:13px; line-height:1.5;">
-            <div style="background-color:#d4edda; color:#155724; padding:4px 8px; border-radius:6px; display:inline-block; font-weight:bold;">
-                Data Gempa
-            </div>
-            <div style="margin-top:8px; color:#6c757d;">{eq['time_wib']} WIB</div>
-            <div style="margin-top:8px; font-size:15px; font-weight:bold; color:#000;">
-                Pusat gempa berada di {eq['place']}
+    with col_km:
+        fault_max_km = st.slider(
+            "Jarak maksimum (km)",
+            min_value=0,
+            max_value=200,
+            value=25,
+            step=5,
+            disabled=fault_kind == 'semua'
+        )
+fault_filter = (fault_kind, fault_max_km) if fault_kind != 'semua' else None
+
+# Apply filters
+with rerun_metrics.stage('filter') as stage:
+    filtered_rows = filter_events(
+        filter_engine, year_filter, mag_range, depth_range, lat_range, lon_range, fault_filter
+    )
+    if mainshock_only:
+        filtered_rows = filtered_rows[mainshock[filtered_rows]]
+    filtered_gdf = gdf.iloc[filtered_rows]
+    stage['rows'] = len(filtered_gdf)
+
+map_filters = {
+    'year': int(year_filter),
+    'mag': list(mag_range),
+    'depth': list(depth_range),
+    'lat': list(lat_range),
+    'lon': list(lon_range),
+    # Kunci = kolom jarak, supaya bisa langsung dipakai filter tile vektor di browser
+    **({FAULT_DISTANCE_COLUMNS[fault_kind]: [0, fault_max_km]} if fault_filter else {}),
+    **({'mainshock': 1} if mainshock_only else {}),
+}
+bvalue_key = filter_hash(data_version, region_key, 'bvalue', map_filters)
+with rerun_metrics.stage('bvalue', rows=len(filtered_rows)):
+    gr = load_gr_stats(bvalue_key, filter_engine.mag[filtered_rows])
+
+with bvalue_panel:
+    st.markdown("""
+    <h5 style="
+        margin-top: 0;
+        margin-bottom: 15px;
+        font-size: 1rem;
+        color: #2c3e50;
+    ">Relasi Magnitudo-Frekuensi (Gutenberg-Richter)</h5>
+    """, unsafe_allow_html=True)
+    if gr is None:
+        st.caption(
+            f"b-value butuh minimal {MIN_EVENTS} kejadian di atas magnitudo kelengkapan "
+            f"({len(filtered_rows)} kejadian hasil filter)."
+        )
+    else:
+        fmd = gr['fmd'].set_index('mag')
+        st.line_chart(
+            np.log10(fmd[['cumulative', 'model']].where(fmd[['cumulative', 'model']] > 0)).rename(
+                columns={'cumulative': 'log N (M >= m)', 'model': 'Model G-R'}
+            ).rename_axis('Magnitudo'),
+            height=220,
+            use_container_width=True
+        )
+        confidence = int(gr['confidence'] * 100)
+        st.markdown(f"""
+        <div class="side-metric">
+            <div class="side-title">b-value (Aki-Utsu)</div>
+            <div class="side-value">{gr['b']:.2f} &plusmn; {gr['b_err']:.2f}</div>
+            <div class="side-subtext">
+                CI {confidence}% {gr['b_ci'][0]:.2f}-{gr['b_ci'][1]:.2f} (bootstrap {gr['samples']}),
+                a = {gr['a']:.2f}
             </div>
-            <div style="margin-top:12px; padding:8px; background:#f8f9fa; border-radius:10px;">
-                <div style="display:flex; justify-content:space-between;">
-                    <div>🔴 <b>Magnitudo:</b></div>
-                    <div><b>{eq['mag']}</b></div>
-                </div>
-                <div style="display:flex; justify-content:space-between; margin-top:4px;">
-                    <div>🟢 <b>Kedalaman:</b></div>
-                    <div><b>{int(eq['depth'])} km</b></div>
-                </div>
-                <div style="display:flex; justify-content:space-between; margin-top:4px;">
-                    <div>📍 <b>Lokasi:</b></div>
-                    <div><b>{round(eq['latitude'], 2)} LS - {round(eq['longitude'], 2)} BT</b></div>
-                </div>
+        </div>
+        <div class="side-metric">
+            <div class="side-title">Magnitudo Kelengkapan (Mc)</div>
+            <div class="side-value">M {gr['mc']:.1f}</div>
+            <div class="side-subtext">
+                CI {confidence}% {gr['mc_ci'][0]:.1f}-{gr['mc_ci'][1]:.1f},
+                {gr['n']:,} dari {gr['events']:,} kejadian di atas Mc
             </div>
         </div>
-        """
-        
-        # Add marker to map
-        folium.CircleMarker(
-            location=[eq['latitude'], eq['longitude']],
-            radius=size,
-            color='black',
-            weight=1,
-            fill=True,
-            fill_color=color,
-            fill_opacity=0.8,
-            popup=folium.Popup(popup_content, max_width=300)
-        ).add_to(m)
-    return m
+        """, unsafe_allow_html=True)
 
 # Display the map
 st.markdown("### Peta Interaktif Kejadian Gempa Bumi", unsafe_allow_html=True)
-map_obj = create_map(filtered_gdf)
-st_folium(
-    map_obj, 
-    width=400,
-    use_container_width=True
+map_mode = st.radio(
+    "Tampilan",
+    options=['Marker', 'Cluster', 'Vector tile', 'Playback'],
+    horizontal=True
+)
+rerun_metrics.labels['mode'] = map_mode
+show_bvalue = st.checkbox("Tampilkan peta b-value", value=False)
+show_density = st.checkbox("Tampilkan peta kepadatan", value=False)
+density_weight = st.selectbox(
+    "Bobot kepadatan",
+    list(DENSITY_WEIGHTS),
+    format_func=DENSITY_WEIGHTS.get,
+    disabled=not show_density
+)
+playback_unit = st.selectbox(
+    "Durasi frame",
+    list(PLAYBACK_UNITS),
+    index=list(PLAYBACK_UNITS).index(DEFAULT_UNIT),
+    format_func=PLAYBACK_UNITS.get,
+    disabled=map_mode != 'Playback'
 )
 
+@st.cache_resource
+def run_tile_server():
+    return start_tile_server()
+
+# Mode playback juga memakai server tile untuk mengirim isi frame
+if map_mode in ('Vector tile', 'Playback'):
+    tile_server = run_tile_server()
+    # Frame playback hanya ada di memori proses ini; server tile lain di port yang sama
+    # (proses Streamlit lain, atau GEMPA_TILE_URL ke host lain) tidak bisa melayaninya
+    if tile_server is None and map_mode == 'Playback':
+        st.warning(
+            f"Server tile tidak bisa dijalankan di port {TILE_PORT} (sudah dipakai proses lain), "
+            "jadi frame playback tidak akan tampil. Jalankan dashboard dengan GEMPA_TILE_PORT "
+            "(dan GEMPA_TILE_URL) yang belum dipakai."
+        )
+
+# Peta hanya memuat kejadian di viewport terakhir (nilai kembalian st_folium) plus margin,
+# dibatasi per level zoom. Key komponen diganti setiap peta dasar berganti (wilayah/mode
+# tile) supaya viewport dari peta sebelumnya tidak terpakai.
+map_view = (region_key, overlay_kind(map_mode))
+if st.session_state.get('map_view') != map_view:
+    st.session_state['map_view'] = map_view
+    st.session_state['map_mounts'] = st.session_state.get('map_mounts', 0) + 1
+map_key = f"peta_{st.session_state['map_mounts']}"
+viewport, map_zoom = viewport_from_state(st.session_state.get(map_key))
+if map_zoom is None:
+    map_zoom = region['zoom']
+view_box = viewport_box(viewport, map_zoom) if viewport else None
+view_limit = viewport_limit(map_zoom)
+with rerun_metrics.stage('viewport') as stage:
+    map_rows = viewport_rows(filter_engine, filtered_rows, view_box, view_limit)
+    stage['rows'] = len(map_rows)
+
+# Peta dasar disimpan per sesi dan wilayah; saat filter berubah hanya layer kejadian
+# yang diganti (st_folium feature_group_to_add), diambil dari LRU per hash filter
+with rerun_metrics.stage('create_map', rows=len(map_rows)) as stage:
+    base_maps = st.session_state.setdefault('base_maps', {})
+    base_key = (region_key, overlay_kind(map_mode))
+    if base_key not in base_maps:
+        overlay_errors = []
+        base_maps[base_key] = BaseMap(
+            create_base_map(region_key, map_mode, on_error=overlay_errors.append), overlay_errors
+        )
+    for message in base_maps[base_key].errors:
+        st.warning(message)
+    map_obj = base_maps[base_key].reset()
+
+    event_layers = st.session_state.setdefault('event_layers', EventLayerCache())
+    if map_mode == 'Playback':
+        # Semua kejadian hasil filter (bukan hanya viewport). Playback didaftarkan setiap
+        # rerun supaya server tile tetap punya frame-nya walau sudah keluar dari LRU.
+        playback_key = filter_hash(data_version, region_key, map_mode, {**map_filters, 'unit': playback_unit})
+        playback = register_playback(playback_key, lambda: Playback(
+            gdf, filtered_rows, playback_unit, mag_min=gdf['mag'].min(), mag_max=gdf['mag'].max()
+        ))
+        event_group = event_layers.get(playback_key, lambda: create_playback_layer(playback_key, playback))
+    else:
+        event_group = event_layers.get(
+            filter_hash(data_version, region_key, map_mode, {**map_filters, 'view': view_box, 'limit': view_limit}),
+            lambda: create_event_layer(
+                gdf.iloc[map_rows], map_mode, map_filters, region_key,
+                mag_min=gdf['mag'].min(),
+                mag_max=gdf['mag'].max(),
+                cluster_data=filtered_gdf
+            )
+        )
+    stage['bytes'] = map_payload_bytes(event_group)
+    feature_groups = [event_group]
+if show_bvalue:
+    with rerun_metrics.stage('bvalue_grid', rows=len(filtered_rows)):
+        bvalue_grid = load_bvalue_grid(bvalue_key, filter_engine, filtered_rows, region['bounds'])
+        feature_groups.append(event_layers.get(bvalue_key, lambda: create_bvalue_layer(bvalue_grid)))
+if show_density:
+    # Satu gambar per kombinasi filter, di-cache per hash filter seperti layer kejadian
+    density_key = filter_hash(data_version, region_key, f'density-{density_weight}', map_filters)
+    with rerun_metrics.stage('density_grid', rows=len(filtered_rows)):
+        density = load_density_grid(density_key, filter_engine, filtered_rows, region['bounds'], density_weight)
+        feature_groups.append(event_layers.get(density_key, lambda: create_density_layer(density)))
+with rerun_metrics.stage('st_folium', payload_bytes=map_payload_bytes(event_group)):
+    st_folium(
+        map_obj, 
+        width=400,
+        use_container_width=True,
+        feature_group_to_add=feature_groups,
+        layer_control=folium.LayerControl(),
+        render=False,
+        key=map_key,
+        returned_objects=['bounds', 'zoom']
+    )
+if map_mode == 'Playback':
+    st.caption(
+        f"Playback {len(playback)} frame per {PLAYBACK_UNITS[playback_unit].lower()} (WIB) dari "
+        f"{len(filtered_rows)} kejadian hasil filter. Isi frame dimuat saat diputar; "
+        "kejadian beberapa frame sebelumnya tetap tampil memudar."
+    )
+elif map_mode == 'Vector tile' and len(filtered_rows) > MAX_TILE_FEATURES:
+    st.caption(
+        f"Mode vector tile: setiap tile memuat maksimal {MAX_TILE_FEATURES} kejadian hasil filter "
+        "dengan magnitudo terbesar, jadi pada zoom jauh sebagian kejadian kecil tidak tampil. "
+        "Perbesar peta untuk melihat semua kejadian."
+    )
+elif map_mode != 'Vector tile' and len(map_rows) < len(filtered_rows):
+    st.caption(
+        f"Peta memuat {len(map_rows)} dari {len(filtered_rows)} kejadian: hanya area yang terlihat, "
+        f"maksimal {view_limit} kejadian dengan magnitudo terbesar pada zoom ini. "
+        "Geser atau perbesar peta untuk memuat kejadian lainnya."
+    )
+if show_bvalue:
+    st.caption(
+        f"Peta b-value: grid {GRID_STEP}°, kejadian hasil filter dalam radius {GRID_RADIUS_KM} km, "
+        f"minimal {GRID_MIN_EVENTS} kejadian di atas Mc per titik. "
+        "Merah = b rendah (≤ 0.6), biru = b tinggi (≥ 1.4); sel kosong = data tidak cukup."
+    )
+if show_density:
+    st.caption(
+        f"Peta kepadatan: {DENSITY_WEIGHTS[density_weight].lower()} per km² dari {density['events']:,} "
+        f"kejadian hasil filter, grid {DENSITY_CELL}°, dihaluskan kernel Gaussian {BANDWIDTH_KM} km. "
+        f"Skala log: terang = tertinggi, transparan = di bawah 1/{10 ** DENSITY_DECADES:,} nilai tertinggi."
+    )
+
 
 
 
@@ -516,18 +696,45 @@ st_folium(
 
 
 
+# Statistik per wilayah / satuan batuan dari kolom atribusi poligon (lihat areas.py)
+area_layers = [key for key in available_layers() if key in gdf.columns]
+if area_layers:
+    st.subheader("Statistik per Wilayah dan Batuan")
+    area_key = st.selectbox(
+        "Kelompokkan per",
+        area_layers,
+        format_func=lambda key: AREA_LAYERS[key]['label']
+    )
+    with rerun_metrics.stage('area_stats', rows=len(filtered_gdf)):
+        area_table = area_stats(filtered_gdf, area_key).round(2).rename_axis(
+            AREA_LAYERS[area_key]['label']
+        ).rename(columns={
+            'count': 'Jumlah Kejadian',
+            'mag_mean': 'Magnitudo Rata-rata',
+            'mag_max': 'Magnitudo Maks',
+            'depth_mean': 'Kedalaman Rata-rata (km)'
+        })
+    st.dataframe(area_table, use_container_width=True)
+
 # Menampilkan tabel data dengan container
 with st.container():
     st.subheader("Data Gempa")
-    st.dataframe(
-        filtered_gdf[['time', 'mag', 'depth', 'place']].rename(columns={
+    with rerun_metrics.stage('dataframe', rows=len(filtered_gdf)) as stage:
+        table = filtered_gdf[['time', 'mag', 'depth', 'place', 'fault_km'] + area_layers].assign(
+            time=format_time(filtered_gdf['time']),
+            fault_km=filtered_gdf['fault_km'].round(1),
+            kind=labels['kind'].iloc[filtered_rows].cat.rename_categories(KIND_LABELS).to_numpy()
+        ).rename(columns={
             'time': 'Waktu',
             'mag': 'Magnitudo',
             'depth': 'Kedalaman (km)',
-            'place': 'Lokasi'
-        }),
-        use_container_width=True
-    )
+            'place': 'Lokasi',
+            'fault_km': 'Jarak ke Sumber (km)',
+            'kind': 'Jenis Gempa',
+            **{key: AREA_LAYERS[key]['label'] for key in area_layers}
+        })
+        stage['bytes'] = int(table.memory_usage(deep=True).sum())
+        st.dataframe(table, use_container_width=True)
 
 # Footer
 st.markdown("""
@@ -538,4 +745,9 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+rerun_metrics.finish()
 
+# Panel debug tersembunyi, buka dengan ?debug=1 di URL
+if st.query_params.get('debug') == '1':
+    with st.expander("Debug: waktu per tahap (rerun terakhir dulu)", expanded=True):
+        st.dataframe(pd.DataFrame(recent_reruns(st.session_state['rerun_history'])), use_container_width=True)
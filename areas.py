@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from pools import pool_context
+
+# Atribusi kejadian ke layer poligon (provinsi, kabupaten/kota, satuan batuan), dihitung
+# sekali saat ingest dan disimpan sebagai kolom kategori di cache Parquet / partisi store.
+# Pengganti gpd.sjoin(..., predicate='within') ad hoc di notebook analisis: statistik
+# per wilayah/batuan cukup group-by kolom kategori, tanpa spatial join per request.
+# Layer yang file-nya tidak ada dilewati (kolomnya tidak dibuat).
+#   path  : shapefile/GeoJSON poligon
+#   field : kolom nama poligon yang disimpan
+#   label : judul di dashboard
+AREA_LAYERS = {
+    'provinsi': {
+        'path': './data/batas/provinsi.shp',
+        'field': 'WADMPR',
+        'label': 'Provinsi',
+    },
+    'kabupaten': {
+        'path': './data/batas/kabupaten.shp',
+        'field': 'WADMKK',
+        'label': 'Kabupaten/Kota',
+    },
+    'batuan': {
+        'path': './data/JABAR/Geology Jawa Barat/Geology Jawa Barat.shp',
+        'field': 'rock_type',
+        'label': 'Jenis Batuan',
+    },
+}
+# Jumlah kejadian per potongan; potongan dikerjakan paralel jika katalog cukup besar
+CHUNK_SIZE = 200_000
+PARALLEL_MIN_EVENTS = 1_000_000
+# Shapefile: geometri di .shp, nama di .dbf
+SIGNATURE_EXTENSIONS = ['.shp', '.dbf', '.prj']
+
+
+def available_layers():
+    return [key for key, layer in AREA_LAYERS.items() if os.path.exists(layer['path'])]
+
+
+@lru_cache(maxsize=None)
+def area_signature():
+    # Identitas konfigurasi dan isi layer yang tersedia; cache katalog dibuat ulang jika berubah
+    h = hashlib.sha256()
+    for key in available_layers():
+        layer = AREA_LAYERS[key]
+        h.update(json.dumps([key, layer['path'], layer['field']]).encode())
+        root, ext = os.path.splitext(layer['path'])
+        paths = [root + e for e in SIGNATURE_EXTENSIONS] if ext.lower() == '.shp' else [layer['path']]
+        for path in paths:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    h.update(f.read())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def load_areas(key):
+    # Poligon layer (dipecah per bagian multipolygon, sudah di-prepare) dalam STRtree,
+    # plus kode nama tiap bagian. Dibaca sekali per proses (termasuk worker).
+    layer = AREA_LAYERS[key]
+    frame = gpd.read_file(layer['path'], columns=[layer['field']])
+    if frame.crs is not None and not frame.crs.equals('EPSG:4326'):
+        frame = frame.to_crs('EPSG:4326')
+    frame = frame[~(frame.geometry.isna() | frame.geometry.is_empty)]
+
+    names = pd.Categorical(frame[layer['field']].astype(str))
+    parts, feature = shapely.get_parts(frame.geometry.values, return_index=True)
+    shapely.prepare(parts)
+    return {
+        'categories': names.categories,
+        'codes': names.codes[feature],
+        'tree': shapely.STRtree(parts),
+    }
+
+
+def _attribute_chunk(key, lon, lat):
+    # Kode nama poligon yang memuat setiap titik, -1 jika di luar semua poligon.
+    # Titik di beberapa poligon (tumpang tindih) mendapat poligon pertama di file.
+    areas = load_areas(key)
+    codes = np.full(len(lon), -1, dtype=np.int32)
+    point, part = areas['tree'].query(shapely.points(lon, lat), predicate='within')
+    order = np.lexsort((part, point))
+    point, part = point[order], part[order]
+    _, first = np.unique(point, return_index=True)
+    codes[point[first]] = areas['codes'][part[first]]
+    return codes
+
+
+def attribute(key, lon, lat, chunk_size=CHUNK_SIZE, workers=None):
+    # Kode nama poligon layer `key` per koordinat (lihat _attribute_chunk).
+    # Potongan dikerjakan di process pool; tiap worker memuat poligonnya sendiri.
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    starts = range(0, len(lon), chunk_size)
+    args = [[key] * len(starts), [lon[s:s + chunk_size] for s in starts], [lat[s:s + chunk_size] for s in starts]]
+
+    workers = min(workers or os.cpu_count() or 1, len(starts))
+    if workers <= 1 or len(lon) < PARALLEL_MIN_EVENTS:
+        results = list(map(_attribute_chunk, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+            results = list(pool.map(_attribute_chunk, *args))
+    return np.concatenate(results) if results else np.array([], dtype=np.int32)
+
+
+def add_area_columns(gdf, workers=None):
+    lon = gdf['longitude'].to_numpy(dtype=float)
+    lat = gdf['latitude'].to_numpy(dtype=float)
+    for key in available_layers():
+        codes = attribute(key, lon, lat, workers=workers)
+        gdf[key] = pd.Categorical.from_codes(codes, categories=load_areas(key)['categories'])
+    return gdf
+
+
+def area_stats(gdf, key):
+    # Ringkasan per poligon: jumlah kejadian, magnitudo rata-rata/maks, kedalaman rata-rata.
+    # Kejadian di luar semua poligon tidak dihitung.
+    return gdf.groupby(key, observed=True).agg(
+        count=('mag', 'size'),
+        mag_mean=('mag', 'mean'),
+        mag_max=('mag', 'max'),
+        depth_mean=('depth', 'mean'),
+    ).sort_values('count', ascending=False)
@@ -0,0 +1,164 @@
+import argparse
+import json
+import multiprocessing
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from catalog import load_catalog
+from filters import FilterEngine, filter_events
+from map_layers import load_overlay
+from maps import create_map
+from regions import DEFAULT_REGION, REGIONS
+from store import region_catalog
+
+# Render peta statis (HTML, opsional PNG) untuk buletin harian/bulanan tanpa Streamlit.
+# Satu preset = satu kombinasi filter dashboard:
+#   {"name": ..., "region": ..., "year": 2024 | null, "mag": [lo, hi], "depth": [lo, hi],
+#    "lat": [lo, hi], "lon": [lo, hi], "mode": "Marker" | "Cluster"}
+# Field yang tidak diisi berarti tanpa filter (sama dengan nilai awal slider).
+EXPORT_DIR = './export'
+RENDER_MODES = ['Marker', 'Cluster']
+PNG_DELAY = 3
+
+# Katalog, FilterEngine dan rentang magnitudo per wilayah. Diisi di proses induk sebelum
+# pool dibuat, sehingga worker hasil fork memakai memori yang sama tanpa membaca ulang.
+_SHARED = {}
+
+
+def load_shared(region_keys):
+    for key in region_keys:
+        if key in _SHARED:
+            continue
+        gdf = load_catalog(region_catalog(key))
+        _SHARED[key] = {
+            'gdf': gdf,
+            'engine': FilterEngine(gdf),
+            'mag_min': gdf['mag'].min(),
+            'mag_max': gdf['mag'].max(),
+        }
+        # Overlay di-cache lru_cache di map_layers, ikut terwariskan ke worker
+        for overlay in REGIONS[key]['overlays']:
+            load_overlay(overlay)
+
+
+def preset_name(preset):
+    # Nama file hasil; tanpa `name`, semua field filter ikut supaya preset berbeda
+    # tidak menghasilkan nama yang sama
+    if preset.get('name'):
+        return re.sub(r'[^\w.-]+', '_', preset['name'])
+    parts = [preset.get('region', DEFAULT_REGION), str(preset.get('year') or 'semua')]
+    for field, prefix in [('mag', 'M'), ('depth', 'D'), ('lat', 'Lat'), ('lon', 'Lon')]:
+        if preset.get(field):
+            parts.append('{}{:g}-{:g}'.format(prefix, *preset[field]))
+    if preset.get('mode', 'Marker') != 'Marker':
+        parts.append(preset['mode'].lower())
+    return '_'.join(parts)
+
+
+def render_preset(preset, out_dir=EXPORT_DIR, png=False):
+    region_key = preset.get('region', DEFAULT_REGION)
+    shared = _SHARED[region_key]
+    rows = filter_events(
+        shared['engine'],
+        preset.get('year'),
+        preset.get('mag'),
+        preset.get('depth'),
+        preset.get('lat'),
+        preset.get('lon'),
+    )
+    m = create_map(
+        shared['gdf'].iloc[rows],
+        preset.get('mode', 'Marker'),
+        region_key=region_key,
+        mag_min=shared['mag_min'],
+        mag_max=shared['mag_max'],
+    )
+
+    name = preset_name(preset)
+    html_path = os.path.join(out_dir, f'{name}.html')
+    m.save(html_path)
+    png_path = None
+    if png:
+        # Butuh selenium + Firefox/geckodriver (lihat folium Map._to_png)
+        png_path = os.path.join(out_dir, f'{name}.png')
+        with open(png_path, 'wb') as f:
+            f.write(m._to_png(PNG_DELAY))
+    return name, len(rows), html_path, png_path
+
+
+def render_all(presets, out_dir=EXPORT_DIR, png=False, workers=None):
+    os.makedirs(out_dir, exist_ok=True)
+    for preset in presets:
+        if preset.get('mode', 'Marker') not in RENDER_MODES:
+            raise ValueError(f"Mode {preset['mode']!r} tidak didukung untuk render statis")
+    # Dua preset dengan nama sama akan saling menimpa file hasilnya
+    duplicates = sorted(name for name, n in Counter(map(preset_name, presets)).items() if n > 1)
+    if duplicates:
+        raise ValueError(f"Nama preset ganda: {', '.join(duplicates)}")
+    region_keys = sorted({p.get('region', DEFAULT_REGION) for p in presets})
+    load_shared(region_keys)
+
+    # fork: worker mewarisi _SHARED. Di platform tanpa fork, initializer memuat
+    # katalog sekali per worker (dari cache Parquet), bukan sekali per preset.
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=load_shared, initargs=(region_keys,)) as pool:
+        futures = [pool.submit(render_preset, preset, out_dir, png) for preset in presets]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def parse_band(text):
+    lo, hi = text.split('-')
+    return [float(lo), float(hi)]
+
+
+def build_presets(args):
+    if args.presets:
+        with open(args.presets) as f:
+            return json.load(f)
+
+    presets = []
+    for region_key in args.regions:
+        if args.years == ['each']:
+            load_shared([region_key])
+            years = _SHARED[region_key]['engine'].years
+        else:
+            years = [None if y == 'all' else int(y) for y in args.years]
+        for year in years:
+            for band in args.mag_bands or [None]:
+                presets.append({
+                    'region': region_key,
+                    'year': year,
+                    'mag': parse_band(band) if band else None,
+                    'depth': parse_band(args.depth) if args.depth else None,
+                    'mode': args.mode,
+                })
+    return presets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render peta gempa statis untuk banyak preset filter")
+    parser.add_argument('--presets', help="File JSON berisi daftar preset (mengabaikan opsi filter lain)")
+    parser.add_argument('--regions', nargs='+', default=[DEFAULT_REGION], choices=list(REGIONS))
+    parser.add_argument('--years', nargs='+', default=['all'],
+                        help="Tahun, 'all' untuk semua tahun, atau 'each' untuk satu peta per tahun")
+    parser.add_argument('--mag-bands', nargs='+', help="Rentang magnitudo, misal 3-5 5-10")
+    parser.add_argument('--depth', help="Rentang kedalaman (km), misal 0-70")
+    parser.add_argument('--mode', default='Marker', choices=RENDER_MODES)
+    parser.add_argument('--out', default=EXPORT_DIR, help="Folder hasil")
+    parser.add_argument('--png', action='store_true', help="Simpan juga PNG (butuh selenium + Firefox)")
+    parser.add_argument('--workers', type=int, help="Jumlah proses (default: jumlah core)")
+    args = parser.parse_args()
+
+    presets = build_presets(args)
+    for name, n, html_path, png_path in render_all(presets, args.out, args.png, args.workers):
+        print(f"{name}: {n} kejadian -> {html_path}" + (f", {png_path}" if png_path else ''))
+    print(f"{len(presets)} peta selesai di {args.out}")
+
+
+if __name__ == '__main__':
+    main()
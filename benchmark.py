@@ -0,0 +1,233 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from aggregates import aggregates_path
+from cache import CACHE_DIR
+from catalog import cache_paths, ingest, load_catalog
+from filters import FilterEngine, filter_events
+from map_layers import PAYLOAD_BUDGET_PER_10K
+from maps import create_map
+from metrics import map_payload_bytes
+from regions import DEFAULT_REGION, REGIONS
+
+# Benchmark katalog sintetis (skema CSV USGS) di dalam batas Jawa-Sumatera:
+# ingest -> load -> index filter -> filter -> create_map -> render HTML (yang dikirim st_folium).
+# Hasil berupa JSON supaya bisa dibandingkan antar commit (--compare); ukuran payload
+# kejadian per 10k dicek terhadap PAYLOAD_BUDGET_PER_10K (--check-budget).
+BENCH_DIR = os.path.join(CACHE_DIR, 'bench')
+BENCH_SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+# Di atas ukuran ini tahap peta dilewati (HTML-nya sudah ratusan MB)
+MAX_MAP_EVENTS = 1_000_000
+BENCH_YEARS = (2000, 2025)
+SEED = 42
+
+USGS_COLUMNS = [
+    'time', 'latitude', 'longitude', 'depth', 'mag', 'magType', 'nst', 'gap', 'dmin', 'rms',
+    'net', 'id', 'updated', 'place', 'type', 'horizontalError', 'depthError', 'magError',
+    'magNst', 'status', 'locationSource', 'magSource',
+]
+
+
+def synthetic_catalog(n, region_key=DEFAULT_REGION, seed=SEED):
+    # Lokasi diambil dari katalog wilayah + jitter supaya kepadatannya mirip data asli;
+    # magnitudo mengikuti Gutenberg-Richter (b = 1) mulai M3.
+    rng = np.random.default_rng(seed)
+    lon_min, lat_min, lon_max, lat_max = REGIONS[region_key]['bounds']
+    base = load_catalog(REGIONS[region_key]['catalog'])
+    pick = rng.integers(0, len(base), n)
+    lon = np.clip(base['longitude'].to_numpy()[pick] + rng.normal(0, 0.3, n), lon_min, lon_max)
+    lat = np.clip(base['latitude'].to_numpy()[pick] + rng.normal(0, 0.3, n), lat_min, lat_max)
+    depth = np.clip(base['depth'].to_numpy()[pick] * rng.lognormal(0, 0.3, n), 0, 700)
+    mag = np.minimum(3 + rng.exponential(1 / np.log(10), n), 9.5).round(1)
+
+    start = pd.Timestamp(f'{BENCH_YEARS[0]}-01-01', tz='UTC').value
+    end = pd.Timestamp(f'{BENCH_YEARS[1]}-12-31', tz='UTC').value
+    t = pd.to_datetime(np.sort(rng.integers(start, end, n))[::-1], utc=True)
+    updated = t + pd.to_timedelta(rng.integers(0, 90 * 86400, n), unit='s')
+    iso = '%Y-%m-%dT%H:%M:%S.%f'
+
+    return pd.DataFrame({
+        'time': t.strftime(iso).str[:-3] + 'Z',
+        'latitude': lat.round(4),
+        'longitude': lon.round(4),
+        'depth': depth.round(3),
+        'mag': mag,
+        'magType': 'mb',
+        'nst': rng.integers(10, 200, n),
+        'gap': rng.integers(10, 200, n),
+        'dmin': rng.uniform(0.1, 5, n).round(3),
+        'rms': rng.uniform(0.3, 1.5, n).round(2),
+        'net': 'us',
+        'id': [f'bench{i:08d}' for i in range(n)],
+        'updated': updated.strftime(iso).str[:-3] + 'Z',
+        'place': base['place'].to_numpy()[pick],
+        'type': 'earthquake',
+        'horizontalError': rng.uniform(2, 12, n).round(2),
+        'depthError': rng.uniform(1, 10, n).round(3),
+        'magError': rng.uniform(0.02, 0.2, n).round(3),
+        'magNst': rng.integers(5, 150, n),
+        'status': 'reviewed',
+        'locationSource': 'us',
+        'magSource': 'us',
+    }, columns=USGS_COLUMNS)
+
+
+def measure(fn, memory=True):
+    # Waktu diukur tanpa tracemalloc; puncak memori dari eksekusi kedua di bawah tracemalloc
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, {'wall_s': round(wall, 4), 'peak_mb': None if peak is None else round(peak / 2 ** 20, 2)}
+
+
+def bench_size(n, memory=True, max_map_events=MAX_MAP_EVENTS, region_key=DEFAULT_REGION):
+    stages = {}
+    source = os.path.join(BENCH_DIR, f'synthetic_{n}.csv')
+    if not os.path.exists(source):
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        synthetic_catalog(n, region_key).to_csv(source, index=False)
+
+    _, stages['ingest'] = measure(lambda: ingest(source), memory)
+    stages['ingest'].update(rows=n, bytes=os.path.getsize(cache_paths(source)[0]),
+                            source_bytes=os.path.getsize(source))
+
+    gdf, stages['load'] = measure(lambda: load_catalog(source), memory)
+    stages['load']['rows'] = len(gdf)
+
+    engine, stages['filter_index'] = measure(lambda: FilterEngine(gdf), memory)
+
+    # Nilai awal slider (semua tahun/rentang) dan preset sempit khas buletin: satu tahun,
+    # M >= 3.5 di sekitar Jawa dan Sumatera bagian selatan (~0.5% katalog sintetis)
+    presets = {
+        'filter_all': (None, None, None, None, None),
+        'filter_preset': (2024, (3.5, 10.0), (0, 300), (-11, -5), (100, 115)),
+    }
+    for stage, args in presets.items():
+        rows, stages[stage] = measure(lambda: gdf.iloc[filter_events(engine, *args)], memory)
+        stages[stage]['rows'] = len(rows)
+
+    mag_min, mag_max = gdf['mag'].min(), gdf['mag'].max()
+    for mode in ['Marker', 'Cluster']:
+        key = mode.lower()
+        if n > max_map_events:
+            stages[f'create_map_{key}'] = stages[f'render_{key}'] = {'skipped': True}
+            continue
+        m, stages[f'create_map_{key}'] = measure(
+            lambda: create_map(gdf, mode, region_key=region_key, mag_min=mag_min, mag_max=mag_max), memory
+        )
+        payload = map_payload_bytes(m)
+        stages[f'create_map_{key}'].update(
+            payload_bytes=payload,
+            payload_per_10k=round(payload / n * 10_000),
+            within_budget=payload / n * 10_000 <= PAYLOAD_BUDGET_PER_10K,
+        )
+        html, stages[f'render_{key}'] = measure(lambda: m.get_root().render(), memory)
+        stages[f'render_{key}']['bytes'] = len(html.encode())
+        del m, html
+
+    # Cache hasil ingest (Parquet, meta, agregat); CSV sintetis disimpan untuk run berikutnya
+    for path in [*cache_paths(source), aggregates_path(source)]:
+        os.remove(path)
+    return stages
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    # Rasio waktu/memori/ukuran per tahap, > 1 berarti lebih lambat/besar dari run lama
+    old_sizes = {r['events']: r['stages'] for r in old['results']}
+    for result in new['results']:
+        before = old_sizes.get(result['events'])
+        if before is None:
+            continue
+        print(f"\n{result['events']} kejadian ({old['commit']} -> {new['commit']})")
+        for stage, cur in result['stages'].items():
+            prev = before.get(stage, {})
+            ratios = [
+                f"{field} x{cur[field] / prev[field]:.2f}"
+                for field in ['wall_s', 'peak_mb', 'bytes', 'payload_per_10k']
+                if cur.get(field) and prev.get(field)
+            ]
+            print(f"  {stage:<20} {'  '.join(ratios) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard gempa dengan katalog sintetis")
+    parser.add_argument('--sizes', nargs='+', type=int, default=BENCH_SIZES)
+    parser.add_argument('--max-map-events', type=int, default=MAX_MAP_EVENTS,
+                        help="Lewati tahap peta di atas jumlah kejadian ini")
+    parser.add_argument('--no-memory', action='store_true', help="Hanya ukur waktu (lebih cepat)")
+    parser.add_argument('--output', help="File JSON hasil (default: data/cache/bench/bench-<commit>.json)")
+    parser.add_argument('--compare', help="File JSON run sebelumnya untuk dibandingkan")
+    parser.add_argument('--check-budget', action='store_true',
+                        help="Keluar dengan status 1 jika payload per 10k kejadian melebihi anggaran")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': [],
+    }
+    for n in args.sizes:
+        print(f"{n} kejadian...")
+        stages = bench_size(n, not args.no_memory, args.max_map_events)
+        report['results'].append({'events': n, 'stages': stages})
+        for stage, s in stages.items():
+            if s.get('skipped'):
+                print(f"  {stage:<20} dilewati")
+                continue
+            extra = ''.join(f"  {k}={s[k]}" for k in ['rows', 'bytes', 'payload_per_10k'] if k in s)
+            print(f"  {stage:<20} {s['wall_s']:>9.3f} s  {s['peak_mb'] or '-':>9} MB{extra}")
+
+    output = args.output or os.path.join(BENCH_DIR, f"bench-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"Hasil disimpan di {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+    over = [
+        (r['events'], stage) for r in report['results']
+        for stage, s in r['stages'].items() if s.get('within_budget') is False
+    ]
+    for n, stage in over:
+        print(f"Melebihi anggaran {PAYLOAD_BUDGET_PER_10K} byte/10k kejadian: {stage} ({n} kejadian)")
+    if args.check_budget and over:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import math
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from faults import KM_PER_DEGREE, haversine_km
+from pools import pool_context
+
+# Relasi Gutenberg-Richter (log10 N = a - b M) untuk katalog hasil filter:
+#   Mc : magnitudo kelengkapan, kurvatur maksimum (bin terbanyak) + MC_CORRECTION
+#   b  : maksimum likelihood Aki-Utsu dengan koreksi lebar bin, galat Shi & Bolt (1982)
+# Selang kepercayaan dari bootstrap: Mc dan b dihitung ulang untuk setiap sampel.
+MAG_BIN = 0.1
+MC_CORRECTION = 0.2
+MIN_EVENTS = 50
+BOOTSTRAP_SAMPLES = 1000
+CONFIDENCE = 0.95
+SEED = 42
+# Jumlah elemen (sampel x kelompok x bin) per potongan bootstrap (batas memori per worker)
+BOOTSTRAP_CHUNK = 5_000_000
+# Di bawah jumlah elemen ini bootstrap dihitung di proses sendiri tanpa process pool
+PARALLEL_MIN_WORK = 50_000_000
+
+# Peta b-value: titik grid tiap GRID_STEP derajat, kejadian dalam radius GRID_RADIUS_KM,
+# b hanya dihitung jika minimal GRID_MIN_EVENTS kejadian di atas Mc titik tersebut dan
+# selang kepercayaan bootstrap-nya tidak lebih lebar dari GRID_MAX_CI_WIDTH (~ +-0.3)
+GRID_STEP = 0.5
+GRID_RADIUS_KM = 100
+GRID_MIN_EVENTS = 50
+GRID_BOOTSTRAP_SAMPLES = 500
+GRID_MAX_CI_WIDTH = 1.2
+
+
+def mag_codes(mag, dm=MAG_BIN):
+    # Magnitudo dibulatkan ke bin -> bilangan bulat (M 4.5 -> 45 untuk dm 0.1)
+    return np.round(np.asarray(mag, dtype=float) / dm).astype(np.int64)
+
+
+def _fit(counts, dm=MAG_BIN, correction=MC_CORRECTION):
+    # Mc, b Aki-Utsu dan galatnya untuk banyak kelompok sekaligus (baris = kelompok,
+    # kolom = jumlah kejadian per bin magnitudo). Semua dalam satuan bin.
+    n_groups, n_bins = counts.shape
+    k = np.arange(n_bins)
+    mc = counts.argmax(axis=1) + int(round(correction / dm))
+    idx = np.minimum(mc, n_bins - 1)[:, None]
+
+    # Jumlah, jumlah kode dan jumlah kuadrat kode untuk bin >= k (kumulatif dari atas)
+    def above(values):
+        tail = values[:, ::-1].cumsum(axis=1)[:, ::-1]
+        return np.where(mc < n_bins, np.take_along_axis(tail, idx, axis=1)[:, 0], 0)
+    n = above(counts)
+    total = above(counts * k)
+    squares = above(counts * k ** 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / n
+        excess = (mean - mc + 0.5) * dm
+        b = np.where((n > 1) & (excess > 0), math.log10(math.e) / excess, np.nan)
+        # Shi & Bolt (1982)
+        b_err = 2.3 * b ** 2 * dm * np.sqrt(np.maximum(squares - n * mean ** 2, 0) / (n * (n - 1)))
+    return mc, b, b_err, n
+
+
+def _bootstrap_chunk(counts, n_samples, seed, confidence):
+    # Sampel ulang dengan pengembalian dari n kejadian = multinomial atas jumlah per bin
+    rng = np.random.default_rng(seed)
+    n = counts.sum(axis=1)
+    sample = rng.multinomial(n, counts / n[:, None], size=(n_samples, len(counts)))
+    mc, b, _, _ = _fit(sample.reshape(-1, counts.shape[1]))
+    tail = (1 - confidence) / 2 * 100
+    with warnings.catch_warnings():
+        # Kelompok yang b-nya tidak terdefinisi di semua sampel -> NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        b_ci = np.nanpercentile(b.reshape(n_samples, -1), [tail, 100 - tail], axis=0).T
+    mc_ci = np.percentile(mc.reshape(n_samples, -1), [tail, 100 - tail], axis=0).T
+    return b_ci, mc_ci
+
+
+def bootstrap(counts, n_samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE, seed=SEED, workers=None):
+    # Selang kepercayaan b dan Mc (dalam bin) per kelompok -> (b_ci, mc_ci), masing-masing
+    # array (kelompok, 2). Kelompok dibagi per potongan dengan seed turunan sehingga
+    # hasilnya sama berapa pun jumlah worker.
+    per_chunk = max(1, BOOTSTRAP_CHUNK // (n_samples * counts.shape[1]))
+    chunks = [counts[start:start + per_chunk] for start in range(0, len(counts), per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [chunks, [n_samples] * len(chunks), seeds, [confidence] * len(chunks)]
+
+    if workers == 1 or len(chunks) == 1 or counts.size * n_samples < PARALLEL_MIN_WORK:
+        results = list(map(_bootstrap_chunk, *args))
+    else:
+        workers = min(workers or os.cpu_count() or 1, len(chunks))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+            results = list(pool.map(_bootstrap_chunk, *args))
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+def gr_stats(mag, n_samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE, dm=MAG_BIN, workers=None):
+    # Ringkasan relasi magnitudo-frekuensi; None jika kejadian terlalu sedikit
+    mag = np.asarray(mag, dtype=float)
+    mag = mag[np.isfinite(mag)]
+    if len(mag) < MIN_EVENTS:
+        return None
+
+    codes = mag_codes(mag, dm)
+    base = int(codes.min())
+    counts = np.bincount(codes - base)[None, :]
+    mc, b, b_err, n = (v[0] for v in _fit(counts, dm))
+    if n < MIN_EVENTS or not np.isfinite(b):
+        return None
+    mc_value = float((mc + base) * dm)
+    a = float(math.log10(n) + b * mc_value)
+    b_ci, mc_ci = (v[0] for v in bootstrap(counts, n_samples, confidence, workers=workers))
+
+    # Distribusi magnitudo-frekuensi (jumlah per bin dan kumulatif M >= bin)
+    bins = (np.arange(counts.shape[1]) + base) * dm
+    fmd = pd.DataFrame({
+        'mag': bins.round(2),
+        'count': counts[0],
+        'cumulative': counts[0][::-1].cumsum()[::-1],
+    })
+    fmd['model'] = np.where(bins >= mc_value - dm / 2, 10 ** (a - b * bins), np.nan)
+
+    return {
+        'events': len(mag),
+        'n': int(n),
+        'mc': round(mc_value, 2),
+        'mc_ci': tuple(round(float(v + base) * dm, 2) for v in mc_ci),
+        'b': float(b),
+        'b_err': float(b_err),
+        'b_ci': tuple(float(v) for v in b_ci),
+        'a': a,
+        'samples': n_samples,
+        'confidence': confidence,
+        'fmd': fmd,
+    }
+
+
+def grid_nodes(bounds, step=GRID_STEP):
+    lon_min, lat_min, lon_max, lat_max = bounds
+    lons = lon_min + step * (np.arange(math.ceil((lon_max - lon_min) / step)) + 0.5)
+    lats = lat_min + step * (np.arange(math.ceil((lat_max - lat_min) / step)) + 0.5)
+    return lons, lats
+
+
+def b_value_grid(index, rows, mag, bounds, step=GRID_STEP, radius_km=GRID_RADIUS_KM,
+                 min_events=GRID_MIN_EVENTS, n_samples=GRID_BOOTSTRAP_SAMPLES,
+                 max_ci_width=GRID_MAX_CI_WIDTH, dm=MAG_BIN, workers=None):
+    # b-value per titik grid dari kejadian hasil filter (rows) dalam radius tiap titik.
+    # Pasangan titik-kejadian dicari sekaligus lewat indeks spasial katalog (EventIndex),
+    # lalu Mc, b dan bootstrap semua titik dihitung dari matriks jumlah (titik x bin).
+    lons, lats = grid_nodes(bounds, step)
+    node_lon, node_lat = (v.ravel() for v in np.meshgrid(lons, lats))
+    shape = (len(lats), len(lons))
+
+    selected = np.zeros(len(index), dtype=bool)
+    selected[rows] = True
+    selected &= np.isfinite(mag)
+
+    # Kotak pencarian selebar radius (derajat bujur diperlebar sesuai lintang)
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = dlat / np.maximum(np.cos(np.radians(np.abs(node_lat) + dlat)), 0.01)
+    boxes = shapely.box(node_lon - dlon, node_lat - dlat, node_lon + dlon, node_lat + dlat)
+    node, event = index.tree.query(boxes)
+    keep = selected[event]
+    node, event = node[keep], event[keep]
+
+    # Jarak haversine untuk menyaring kotak menjadi lingkaran
+    keep = haversine_km(node_lon[node], node_lat[node], index.lon[event], index.lat[event]) <= radius_km
+    node, event = node[keep], event[keep]
+
+    codes = mag_codes(mag[event], dm)
+    base = int(codes.min()) if len(codes) else 0
+    n_bins = int(codes.max()) - base + 1 if len(codes) else 1
+    counts = np.bincount(node * n_bins + codes - base, minlength=len(node_lon) * n_bins)
+    counts = counts.reshape(len(node_lon), n_bins)
+    mc, b, b_err, n = _fit(counts, dm)
+
+    b_ci = np.full((len(node_lon), 2), np.nan)
+    valid = np.flatnonzero((n >= min_events) & np.isfinite(b))
+    if len(valid):
+        b_ci[valid] = bootstrap(counts[valid], n_samples, workers=workers)[0]
+    b[~((n >= min_events) & (b_ci[:, 1] - b_ci[:, 0] <= max_ci_width))] = np.nan
+
+    return {
+        'lon': lons,
+        'lat': lats,
+        'step': step,
+        'radius_km': radius_km,
+        'b': b.reshape(shape),
+        'b_err': b_err.reshape(shape),
+        'b_lo': b_ci[:, 0].reshape(shape),
+        'b_hi': b_ci[:, 1].reshape(shape),
+        'mc': ((mc + base) * dm).reshape(shape),
+        'n': n.reshape(shape),
+    }
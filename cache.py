@@ -0,0 +1,40 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+# Folder semua cache turunan (Parquet katalog, store, tile, metrik, ...)
+CACHE_DIR = './data/cache'
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@contextmanager
+def atomic_path(path):
+    # Tulis atomik: isi ditulis ke file sementara lalu os.replace, supaya pembaca lain
+    # tidak melihat file setengah jadi. Nama sementara unik per proses dan thread, jadi
+    # penulis bersamaan (thread tile server, proses CLI) tidak saling menimpa.
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_json(path, obj):
+    with atomic_path(path) as tmp, open(tmp, 'w') as f:
+        json.dump(obj, f, indent=1)
+
+
+def write_parquet(frame, path):
+    with atomic_path(path) as tmp:
+        frame.to_parquet(tmp, index=False)
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import threading
+
+import geopandas as gpd
+import pandas as pd
+
+from aggregates import Aggregates, aggregates_path, build_table
+from areas import area_signature
+from cache import CACHE_DIR, file_hash, write_json, write_parquet
+from derived import add_derived_columns
+from faults import check_nearest, fault_signature
+from regions import REGIONS
+from sources import CATALOG_SOURCES, read_source
+from store import load_store, read_state
+
+# Katalog siap pakai: sumber mentah (sources.py) + kolom turunan (derived.py), di-cache
+# sebagai Parquet; folder = store hasil sinkronisasi FDSN (store.py)
+
+# Naikkan nilai ini jika isi cache berubah, supaya cache lama dibuat ulang
+CACHE_VERSION = 6
+
+# Thread tile server memanggil catalog_version bersamaan; cache basi cukup di-ingest sekali
+_ingest_lock = threading.Lock()
+
+
+def cache_paths(path):
+    name = os.path.basename(path)
+    return (
+        os.path.join(CACHE_DIR, name + '.parquet'),
+        os.path.join(CACHE_DIR, name + '.meta.json'),
+    )
+
+
+def _source_stat(path):
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def cache_is_fresh(path):
+    parquet_path, meta_path = cache_paths(path)
+    if not (os.path.exists(parquet_path) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('version') != CACHE_VERSION:
+        return False
+    # Data patahan berubah -> kolom jarak perlu dihitung ulang
+    if meta.get('faults') != fault_signature():
+        return False
+    # Layer poligon (provinsi, batuan, ...) berubah atau ditambahkan
+    if meta.get('areas') != area_signature():
+        return False
+
+    stat = _source_stat(path)
+    if meta.get('mtime_ns') == stat['mtime_ns'] and meta.get('size') == stat['size']:
+        return True
+
+    # mtime berubah (misal setelah git checkout), cek isi file lewat hash
+    if meta.get('sha256') != file_hash(path):
+        return False
+    meta.update(stat)
+    write_json(meta_path, meta)
+    return True
+
+
+def ingest(path):
+    # Konversi katalog sumber menjadi file Parquet bertipe, lengkap dengan kolom turunan.
+    # Folder cache dicek dulu supaya cache yang tidak bisa ditulis gagal sebelum katalog dibaca.
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if not os.access(CACHE_DIR, os.W_OK):
+        raise PermissionError(f"folder cache tidak bisa ditulis: {CACHE_DIR}")
+    gdf = add_derived_columns(read_source(path))
+    parquet_path, meta_path = cache_paths(path)
+
+    write_parquet(gdf, parquet_path)
+
+    # Agregat untuk panel statistik dibuat sekalian (lihat aggregates.py)
+    write_parquet(build_table(gdf), aggregates_path(path))
+
+    meta = {
+        'version': CACHE_VERSION, 'source': path, 'sha256': file_hash(path), 'rows': len(gdf),
+        'faults': fault_signature(), 'areas': area_signature(),
+    }
+    meta.update(_source_stat(path))
+    write_json(meta_path, meta)
+    return gdf
+
+
+def ensure_ingested(path):
+    # Ingest jika cache basi -> GeoDataFrame hasil ingest, atau None jika cache masih valid
+    if cache_is_fresh(path):
+        return None
+    with _ingest_lock:
+        if cache_is_fresh(path):
+            return None
+        return ingest(path)
+
+
+def load_catalog(path):
+    # Folder = store hasil sinkronisasi FDSN (lihat store.py)
+    if os.path.isdir(path):
+        return load_store(path)
+
+    # Baca dari cache Parquet, buat ulang jika sumber berubah
+    try:
+        gdf = ensure_ingested(path)
+        return gdf if gdf is not None else gpd.read_parquet(cache_paths(path)[0])
+    except OSError:
+        # Folder cache tidak bisa ditulis, baca langsung dari sumber
+        return add_derived_columns(read_source(path))
+
+
+def catalog_version(path):
+    # Identitas isi katalog, dipakai sebagai kunci cache turunan (tile, agregat, dst.)
+    if os.path.isdir(path):
+        return f"store-{read_state(path)['version'][:12]}"
+    try:
+        ensure_ingested(path)
+        with open(cache_paths(path)[1]) as f:
+            meta = json.load(f)
+        sha256, faults, areas = meta['sha256'], meta['faults'], meta['areas']
+    except OSError:
+        # Folder cache tidak bisa ditulis: versi dihitung langsung dari isi sumber
+        sha256, faults, areas = file_hash(path), fault_signature(), area_signature()
+    return f"v{CACHE_VERSION}-{sha256[:12]}-{faults[:8]}-{areas[:8]}"
+
+
+def load_aggregates(path):
+    # Baca agregat katalog/store; dibuat ulang dari katalog jika belum ada.
+    # catalog_version() meng-ingest ulang katalog statis yang berubah (sekaligus agregatnya).
+    catalog_version(path)
+    agg_path = aggregates_path(path)
+    try:
+        return Aggregates(pd.read_parquet(agg_path))
+    except OSError:
+        table = build_table(load_catalog(path))
+    try:
+        write_parquet(table, agg_path)
+    except OSError:
+        pass
+    return Aggregates(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kelola cache katalog gempa")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_ingest = sub.add_parser('ingest', help="Konversi katalog sumber ke Parquet")
+    p_ingest.add_argument('sources', nargs='*', help="Nama katalog (default: semua)")
+    p_ingest.add_argument('--force', action='store_true', help="Buat ulang walaupun cache masih valid")
+
+    # Cek regresi jarak patahan; status 1 jika ada jarak yang berbeda
+    p_check = sub.add_parser('check-faults', help="Bandingkan jarak patahan terdekat dengan pencarian menyeluruh")
+    p_check.add_argument('paths', nargs='*', help="Katalog/store (default: katalog semua region)")
+
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        names = args.sources or list(CATALOG_SOURCES)
+        for name in names:
+            path = CATALOG_SOURCES.get(name, name)
+            if not args.force and cache_is_fresh(path):
+                print(f"{name}: cache masih valid")
+                continue
+            gdf = ingest(path)
+            print(f"{name}: {len(gdf)} kejadian -> {cache_paths(path)[0]}")
+
+    elif args.command == 'check-faults':
+        failed = False
+        for path in args.paths or sorted({r['catalog'] for r in REGIONS.values()}):
+            gdf = load_catalog(path)
+            mismatches = check_nearest(gdf['longitude'].to_numpy(dtype=float), gdf['latitude'].to_numpy(dtype=float))
+            print(f"{path}: {len(gdf)} kejadian, berbeda {mismatches}")
+            failed |= any(mismatches.values())
+        if failed:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
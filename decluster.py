@@ -0,0 +1,190 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import CACHE_DIR, write_parquet
+from catalog import catalog_version, load_catalog
+from faults import KM_PER_DEGREE, haversine_km
+
+# Declustering jendela ruang-waktu (Gardner & Knopoff 1974): kejadian diproses dari
+# magnitudo terbesar; kejadian yang belum masuk klaster dan berada dalam jendela jarak
+# L(M) serta jendela waktu [-FORESHOCK_FRACTION * T(M), T(M)] ikut klaster kejadian itu.
+# Kejadian terbesar di klaster = gempa utama, sebelum/sesudahnya = pendahuluan/susulan.
+# Pasangan kandidat dicari lewat indeks grid sel x waktu (bukan scan O(n^2)).
+KINDS = ['mainshock', 'foreshock', 'aftershock']
+KIND_LABELS = {
+    'mainshock': 'Gempa utama',
+    'foreshock': 'Gempa pendahuluan',
+    'aftershock': 'Gempa susulan',
+}
+FORESHOCK_FRACTION = 1.0
+DEFAULT_WINDOW = 'gardner_knopoff'
+# Naikkan jika algoritma berubah, supaya label di cache dibuat ulang
+DECLUSTER_VERSION = 1
+DECLUSTER_DIR = os.path.join(CACHE_DIR, 'decluster')
+
+# Ukuran sel grid indeks (derajat) dan jumlah kejadian per potongan pencarian pasangan
+CELL_DEGREES = 0.25
+CHUNK_SIZE = 100_000
+SECONDS_PER_DAY = 86400
+
+
+def gardner_knopoff_window(mag):
+    # (jarak km, waktu hari)
+    km = 10 ** (0.1238 * mag + 0.983)
+    days = np.where(mag >= 6.5, 10 ** (0.032 * mag + 2.7389), 10 ** (0.5409 * mag - 0.547))
+    return km, days
+
+
+def uhrhammer_window(mag):
+    return np.exp(-1.024 + 0.804 * mag), np.exp(-2.87 + 1.235 * mag)
+
+
+WINDOWS = {
+    'gardner_knopoff': gardner_knopoff_window,
+    'uhrhammer': uhrhammer_window,
+}
+
+
+def label_version(window=DEFAULT_WINDOW):
+    return f'{window}-v{DECLUSTER_VERSION}'
+
+
+def _expand(starts, counts):
+    # Posisi starts[k] .. starts[k] + counts[k] - 1 untuk semua k -> (k, posisi)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.cumsum(counts) - counts
+    return owner, np.arange(counts.sum()) - np.repeat(offsets - starts, counts)
+
+
+def window_pairs(lon, lat, t, km, seconds, fore_seconds, cell_degrees=CELL_DEGREES,
+                 chunk_size=CHUNK_SIZE):
+    # Semua pasangan (i, j), i != j, dengan j di dalam jendela kejadian i.
+    # Indeks: kejadian diurutkan per (sel grid, waktu) dengan kunci gabungan
+    # sel * rentang + waktu, sehingga kejadian satu sel dalam rentang waktu tertentu
+    # adalah satu potongan array (dua searchsorted).
+    valid = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat))
+    empty = np.array([], dtype=np.int64)
+    if not len(valid):
+        return empty, empty
+
+    cx = np.floor(lon[valid] / cell_degrees).astype(np.int64)
+    cy = np.floor(lat[valid] / cell_degrees).astype(np.int64)
+    x_min, y_min = cx.min(), cy.min()
+    nx, ny = cx.max() - x_min + 1, cy.max() - y_min + 1
+    t0 = t[valid].min()
+    span = int(t[valid].max() - t0) + 1
+    key = ((cx - x_min) * ny + (cy - y_min)) * span + (t[valid] - t0)
+    order = np.argsort(key, kind='stable')
+    rows, keys = valid[order], key[order]
+
+    # Kejadian yang punya jendela (magnitudo diketahui)
+    claimers = valid[np.isfinite(km[valid])]
+    pairs_i, pairs_j = [], []
+    for start in range(0, len(claimers), chunk_size):
+        i = claimers[start:start + chunk_size]
+        # Kotak sel yang mencakup lingkaran L(M); derajat bujur diperlebar sesuai lintang
+        dlat = km[i] / KM_PER_DEGREE
+        dlon = dlat / np.maximum(np.cos(np.radians(np.minimum(np.abs(lat[i]) + dlat, 90))), 0.01)
+        x0 = np.clip(np.floor((lon[i] - dlon) / cell_degrees).astype(np.int64) - x_min, 0, nx - 1)
+        x1 = np.clip(np.floor((lon[i] + dlon) / cell_degrees).astype(np.int64) - x_min, 0, nx - 1)
+        y0 = np.clip(np.floor((lat[i] - dlat) / cell_degrees).astype(np.int64) - y_min, 0, ny - 1)
+        y1 = np.clip(np.floor((lat[i] + dlat) / cell_degrees).astype(np.int64) - y_min, 0, ny - 1)
+        width = y1 - y0 + 1
+        owner, k = _expand(np.zeros(len(i), dtype=np.int64), (x1 - x0 + 1) * width)
+        cell = (x0[owner] + k // width[owner]) * ny + y0[owner] + k % width[owner]
+
+        # Rentang waktu jendela di setiap sel
+        ti = t[i][owner] - t0
+        lo = np.searchsorted(keys, cell * span + np.clip(ti - fore_seconds[i][owner], 0, span - 1), 'left')
+        hi = np.searchsorted(keys, cell * span + np.clip(ti + seconds[i][owner], 0, span - 1), 'right')
+        counts = hi - lo
+        hit = counts > 0
+        pair, pos = _expand(lo[hit], counts[hit])
+        a, b = i[owner[hit][pair]], rows[pos]
+
+        keep = (a != b) & (haversine_km(lon[a], lat[a], lon[b], lat[b]) <= km[a])
+        pairs_i.append(a[keep])
+        pairs_j.append(b[keep])
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def decluster(lon, lat, t, mag, window=DEFAULT_WINDOW, foreshock_fraction=FORESHOCK_FRACTION):
+    # t dalam detik. Hasil: nomor klaster (0 = kejadian independen, klaster diberi nomor
+    # 1.. urut waktu gempa utamanya) dan jenis (indeks KINDS) per kejadian.
+    lon, lat, mag = (np.asarray(v, dtype=float) for v in (lon, lat, mag))
+    t = np.asarray(t, dtype=np.int64)
+    n = len(mag)
+    km, days = WINDOWS[window](mag)
+    seconds = days * SECONDS_PER_DAY
+    a, b = window_pairs(lon, lat, t, km, seconds, seconds * foreshock_fraction)
+
+    # Daftar pasangan per kejadian (CSR), kejadian diproses dari magnitudo terbesar
+    order = np.argsort(a, kind='stable')
+    a, b = a[order], b[order]
+    sources, starts = np.unique(a, return_index=True)
+    stops = np.r_[starts[1:], len(a)].astype(np.int64)
+    rank = np.lexsort((t[sources], -np.nan_to_num(mag[sources], nan=-np.inf)))
+
+    cluster = np.full(n, -1, dtype=np.int64)
+    for i, start, stop in zip(sources[rank].tolist(), starts[rank].tolist(), stops[rank].tolist()):
+        if cluster[i] >= 0:
+            continue
+        members = b[start:stop]
+        members = members[cluster[members] < 0]
+        if len(members):
+            cluster[members] = i
+            cluster[i] = i
+
+    # Gempa utama = magnitudo terbesar di klaster (kejadian paling awal jika sama)
+    rows = np.flatnonzero(cluster >= 0)
+    ranked = rows[np.lexsort((t[rows], -np.nan_to_num(mag[rows], nan=-np.inf), cluster[rows]))]
+    groups, first = np.unique(cluster[ranked], return_index=True)
+    mains = ranked[first]
+    group = np.searchsorted(groups, cluster[rows])
+    main_of = mains[group]
+
+    kind = np.zeros(n, dtype=np.int8)
+    kind[rows] = np.where(rows == main_of, 0, np.where(t[rows] < t[main_of], 1, 2))
+    by_time = np.empty(len(mains), dtype=np.int32)
+    by_time[np.argsort(t[mains], kind='stable')] = np.arange(1, len(mains) + 1)
+    number = np.zeros(n, dtype=np.int32)
+    number[rows] = by_time[group]
+    return number, kind
+
+
+def declustering_path(path, window=DEFAULT_WINDOW):
+    name = os.path.basename(os.path.normpath(path))
+    return os.path.join(DECLUSTER_DIR, f'{name}-{catalog_version(path)}-{label_version(window)}.parquet')
+
+
+def load_declustering(path, gdf=None, window=DEFAULT_WINDOW):
+    # Label declustering katalog (urutan baris sama dengan load_catalog), disimpan
+    # di disk per versi katalog; label lama katalog yang sama dihapus
+    cache_path = declustering_path(path, window)
+    try:
+        labels = pd.read_parquet(cache_path)
+        if gdf is None or len(labels) == len(gdf):
+            return labels
+    except OSError:
+        pass
+
+    if gdf is None:
+        gdf = load_catalog(path)
+    cluster, kind = decluster(
+        gdf['longitude'].to_numpy(), gdf['latitude'].to_numpy(),
+        gdf['epoch_ms'].to_numpy() // 1000, gdf['mag'].to_numpy(), window
+    )
+    labels = pd.DataFrame({'cluster': cluster, 'kind': pd.Categorical.from_codes(kind, KINDS)})
+    try:
+        os.makedirs(DECLUSTER_DIR, exist_ok=True)
+        name = os.path.basename(os.path.normpath(path))
+        for old in glob.glob(os.path.join(DECLUSTER_DIR, glob.escape(name) + '-*.parquet')):
+            os.remove(old)
+        write_parquet(labels, cache_path)
+    except OSError:
+        # Folder cache tidak bisa ditulis, label tetap dipakai dari memori
+        pass
+    return labels
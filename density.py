@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+
+from faults import KM_PER_DEGREE
+
+# Peta kepadatan seismisitas: kejadian hasil filter dihitung per sel grid DENSITY_CELL
+# derajat, lalu dihaluskan kernel Gaussian selebar BANDWIDTH_KM. Konvolusi lewat FFT,
+# jadi biayanya bergantung ukuran grid, bukan jumlah kejadian.
+# Bobot: jumlah kejadian atau energi seismik (log10 E = 1.5 M + 4.8, Joule).
+DENSITY_WEIGHTS = {
+    'count': 'Jumlah kejadian',
+    'energy': 'Energi seismik',
+}
+DENSITY_CELL = 0.05
+BANDWIDTH_KM = 15
+# Kernel dipotong di radius ini (kelipatan sigma); grid diberi tepi selebar itu
+# supaya konvolusi FFT (sirkular) tidak membungkus ke sisi seberang
+KERNEL_SIGMAS = 3
+
+
+def event_energy(mag):
+    return 10 ** (1.5 * np.asarray(mag, dtype=float) + 4.8)
+
+
+def density_grid(lon, lat, bounds, weights=None, cell=DENSITY_CELL, bandwidth_km=BANDWIDTH_KM):
+    # Kepadatan per km2 (kejadian atau Joule) di pusat sel grid dalam bounds
+    lon_min, lat_min, lon_max, lat_max = bounds
+    nx = math.ceil((lon_max - lon_min) / cell)
+    ny = math.ceil((lat_max - lat_min) / cell)
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    weights = np.ones(len(lon)) if weights is None else np.asarray(weights, dtype=float)
+
+    ix = np.floor((lon - lon_min) / cell)
+    iy = np.floor((lat - lat_min) / cell)
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny) & np.isfinite(weights)
+    counts = np.bincount(
+        (iy[inside] * nx + ix[inside]).astype(np.int64), weights=weights[inside], minlength=nx * ny
+    ).reshape(ny, nx)
+
+    # Sigma dalam sel; sel bujur lebih sempit (cos lintang tengah grid)
+    sigma_y = bandwidth_km / KM_PER_DEGREE / cell
+    sigma_x = sigma_y / math.cos(math.radians((lat_min + lat_max) / 2))
+    ry, rx = math.ceil(KERNEL_SIGMAS * sigma_y), math.ceil(KERNEL_SIGMAS * sigma_x)
+    shape = (ny + 2 * ry, nx + 2 * rx)
+    dy = np.fft.fftfreq(shape[0], 1 / shape[0])
+    dx = np.fft.fftfreq(shape[1], 1 / shape[1])
+    kernel = np.exp(-0.5 * ((dy[:, None] / sigma_y) ** 2 + (dx[None, :] / sigma_x) ** 2))
+    kernel[(np.abs(dy)[:, None] > ry) | (np.abs(dx)[None, :] > rx)] = 0
+    kernel /= kernel.sum()
+
+    padded = np.zeros(shape)
+    padded[ry:ry + ny, rx:rx + nx] = counts
+    smooth = np.fft.irfft2(np.fft.rfft2(padded) * np.fft.rfft2(kernel), s=shape)[ry:ry + ny, rx:rx + nx]
+
+    lats = lat_min + cell * (np.arange(ny) + 0.5)
+    cell_km2 = (cell * KM_PER_DEGREE) ** 2 * np.cos(np.radians(lats))
+    return {
+        'lon': lon_min + cell * (np.arange(nx) + 0.5),
+        'lat': lats,
+        'step': cell,
+        'bandwidth_km': bandwidth_km,
+        # Sisa pembulatan FFT bisa sedikit negatif
+        'density': np.maximum(smooth, 0) / cell_km2[:, None],
+        'events': int(inside.sum()),
+    }
@@ -0,0 +1,25 @@
+from areas import add_area_columns, available_layers
+from faults import FAULT_COLUMNS, FAULT_LAYERS, add_fault_columns
+from sources import PLACE_COLUMNS, add_place_columns
+
+# Kolom turunan yang butuh data di luar katalog: jarak ke patahan/megathrust terdekat
+# (faults.py) dan wilayah/satuan batuan (areas.py). Dihitung sekali saat ingest katalog
+# statis atau saat kejadian baru masuk ke store, lalu ikut tersimpan di Parquet.
+
+
+def add_derived_columns(gdf):
+    return add_area_columns(add_fault_columns(gdf))
+
+
+def ensure_derived_columns(gdf):
+    # Partisi store lama bisa belum punya sebagian kolom (lokasi, jarak patahan, layer
+    # wilayah baru); yang kurang dihitung, lalu kolom kategori dikembalikan karena
+    # kategori berbeda per partisi menjadi object setelah partisi digabung
+    layers = available_layers()
+    for columns, add in [(PLACE_COLUMNS, add_place_columns), (FAULT_COLUMNS, add_fault_columns),
+                         (layers, add_area_columns)]:
+        if any(col not in gdf.columns for col in columns):
+            gdf = add(gdf)
+    for col in [*PLACE_COLUMNS, *(f'{key}_name' for key in FAULT_LAYERS), *layers]:
+        gdf[col] = gdf[col].astype('category')
+    return gdf
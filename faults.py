@@ -0,0 +1,202 @@
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+import shapely
+
+from overlays import OVERLAYS, load_overlay_frame
+
+# Jarak setiap kejadian ke patahan dan zona megathrust terdekat (layer di OVERLAYS).
+# Geometri dipecah menjadi segmen garis dalam STRtree. Kandidat segmen dicari lewat pohon
+# sekali per sel grid yang berisi kejadian, lalu jarak great-circle setiap kejadian ke
+# titik terdekat di segmen kandidat sel-nya dihitung vektor per potongan pasangan.
+# Hasilnya kolom katalog (ikut tersimpan di cache Parquet / partisi store):
+#   <layer>_km, <layer>_name : jarak (km) dan nama segmen terdekat per layer
+#   fault_km                 : jarak ke sumber terdekat dari semua layer
+FAULT_LAYERS = list(OVERLAYS)
+FAULT_DISTANCE_COLUMNS = {
+    'terdekat': 'fault_km',
+    'patahan': 'patahan_km',
+    'megathrust': 'megathrust_km',
+}
+FAULT_COLUMNS = ['fault_km'] + [f'{key}_{col}' for key in FAULT_LAYERS for col in ['km', 'name']]
+# Kejadian dikelompokkan per sel grid (derajat); pohon hanya di-query sekali per sel
+CELL_DEGREES = 0.05
+# Pencarian segmen terdekat dibatasi radius ini dulu (derajat); sel yang lebih jauh
+# dicari ulang tanpa batas. Pencarian berbatas jauh lebih cepat di STRtree.
+NEAR_DEGREES = 1.0
+# Batas jumlah pasangan kejadian-segmen yang dihitung sekaligus (memori)
+PAIR_BATCH = 5_000_000
+# Bumi bola; dipakai juga oleh bvalue, density dan decluster
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+@lru_cache(maxsize=None)
+def fault_signature():
+    # Identitas isi data patahan; cache katalog dibuat ulang jika berubah
+    h = hashlib.sha256()
+    for key in FAULT_LAYERS:
+        with open(OVERLAYS[key]['path'], 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def fault_segments(key):
+    # Segmen (x0, y0, x1, y1) semua garis/batas poligon layer, nomor fitur tiap segmen,
+    # STRtree segmen, dan poligon (kejadian di dalam poligon berjarak 0)
+    frame = load_overlay_frame(key)
+    names = frame[OVERLAYS[key]['fields'][0]].fillna('').astype(str).to_numpy()
+    geoms = frame.geometry.values
+    polygonal = np.isin(shapely.get_type_id(geoms), [3, 6])
+    lines = np.where(polygonal, shapely.boundary(geoms), geoms)
+
+    parts, feature = shapely.get_parts(lines, return_index=True)
+    coords, part = shapely.get_coordinates(parts, return_index=True)
+    same = part[1:] == part[:-1]
+    start, end = coords[:-1][same], coords[1:][same]
+    segments = shapely.linestrings(np.stack([start, end], axis=1))
+
+    polygons = np.flatnonzero(polygonal)
+    shapely.prepare(geoms[polygons])
+    return {
+        'x0': start[:, 0], 'y0': start[:, 1], 'x1': end[:, 0], 'y1': end[:, 1],
+        'feature': feature[part[:-1][same]],
+        'names': names,
+        'tree': shapely.STRtree(segments),
+        'polygons': polygons,
+        'polygon_geoms': geoms,
+    }
+
+
+def haversine_km(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = (np.radians(v) for v in (lon1, lat1, lon2, lat2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1)))
+
+
+def _cell_candidates(seg, lon, lat, half_diagonal):
+    # Segmen kandidat per pusat sel: semua segmen yang mungkin terdekat (secara geodesik)
+    # untuk titik mana pun di dalam sel. Jarak terdekat dalam derajat dari pusat sel
+    # + setengah diagonal sel = batas atas untuk titik di sel itu. Satu derajat bujur lebih
+    # pendek dari satu derajat lintang, jadi radius diperlebar sebesar 1/cos(lintang).
+    points = shapely.points(lon, lat)
+    bound = np.full(len(lon), np.inf)
+    (p, _), d = seg['tree'].query_nearest(
+        points, max_distance=NEAR_DEGREES, return_distance=True, all_matches=False
+    )
+    bound[p] = d
+    far = np.flatnonzero(np.isinf(bound))
+    if len(far):
+        (p, _), d = seg['tree'].query_nearest(points[far], return_distance=True, all_matches=False)
+        bound[far[p]] = d
+    bound += half_diagonal
+    stretch = 1 / np.maximum(np.cos(np.radians(np.abs(lat) + bound + half_diagonal)), 0.01)
+    radius = bound * stretch * 1.0001 + half_diagonal
+    cell, segment = seg['tree'].query(points, predicate='dwithin', distance=radius)
+    return cell, segment
+
+
+def _nearest_pairs(seg, lon, lat, point, segment):
+    # Jarak great-circle setiap pasangan ke titik terdekat di segmen; titik itu dicari
+    # pada bidang lokal (bujur diskalakan cos lintang titik)
+    scale = np.cos(np.radians(lat[point]))
+    x0, y0 = seg['x0'][segment], seg['y0'][segment]
+    dx, dy = (seg['x1'][segment] - x0) * scale, seg['y1'][segment] - y0
+    px, py = (lon[point] - x0) * scale, lat[point] - y0
+    length = dx * dx + dy * dy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.clip(np.where(length > 0, (px * dx + py * dy) / length, 0), 0, 1)
+    return haversine_km(lon[point], lat[point], x0 + t * (seg['x1'][segment] - x0), y0 + t * dy)
+
+
+def nearest_fault(key, lon, lat, cell_degrees=CELL_DEGREES, pair_batch=PAIR_BATCH):
+    # Jarak (km) dan nama fitur terdekat layer `key` untuk setiap koordinat
+    seg = fault_segments(key)
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    km = np.full(len(lon), np.nan)
+    feature = np.full(len(lon), -1)
+    valid = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat))
+
+    # Kejadian diurutkan per sel; kandidat segmen dicari per sel, bukan per kejadian
+    ix = np.floor(lon[valid] / cell_degrees).astype(np.int64)
+    iy = np.floor(lat[valid] / cell_degrees).astype(np.int64)
+    cells, inverse = np.unique(ix * (1 << 32) + iy, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    rows, inverse = valid[order], inverse[order]
+    # iy bisa negatif (selatan ekuator), jadi iy dibaca dulu dari 32 bit bawah
+    cell_iy = (cells & 0xFFFFFFFF).astype(np.int32)
+    cell_lon = (((cells - cell_iy) >> 32) + 0.5) * cell_degrees
+    cell_lat = (cell_iy + 0.5) * cell_degrees
+    cell, segment = _cell_candidates(seg, cell_lon, cell_lat, cell_degrees * 2 ** 0.5 / 2)
+    cell_start = np.searchsorted(cell, np.arange(len(cells) + 1))
+    per_row = np.diff(cell_start)[inverse]
+
+    # Pasangan kejadian x kandidat sel-nya, diproses per potongan
+    ends = np.cumsum(per_row)
+    start = 0
+    while start < len(rows):
+        stop = max(start + 1, int(np.searchsorted(ends, ends[start] - per_row[start] + pair_batch)))
+        counts = per_row[start:stop]
+        offsets = np.r_[0, np.cumsum(counts)[:-1]]
+        point = np.repeat(np.arange(start, stop), counts)
+        within = np.arange(counts.sum()) - np.repeat(offsets, counts)
+        pair_segment = segment[cell_start[inverse[point]] + within]
+        dist = _nearest_pairs(seg, lon[rows], lat[rows], point, pair_segment)
+
+        best = np.minimum.reduceat(dist, offsets)
+        hit = np.flatnonzero(dist == np.repeat(best, counts))
+        _, first = np.unique(point[hit], return_index=True)
+        km[rows[start:stop]] = best
+        feature[rows[start:stop]] = seg['feature'][pair_segment[hit[first]]]
+        start = stop
+
+    # Kejadian di dalam poligon (zona megathrust) berjarak 0
+    for i in seg['polygons']:
+        inside = valid[shapely.contains_xy(seg['polygon_geoms'][i], lon[valid], lat[valid])]
+        km[inside] = 0.0
+        feature[inside] = i
+    names = np.where(feature >= 0, seg['names'][np.maximum(feature, 0)], '')
+    return km, names
+
+
+def nearest_fault_exact(key, lon, lat, pair_batch=PAIR_BATCH):
+    # Pembanding nearest_fault: jarak ke semua segmen layer (tanpa grid/pohon), lambat
+    seg = fault_segments(key)
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    km = np.full(len(lon), np.nan)
+    n_seg = len(seg['x0'])
+    valid = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat))
+    step = max(1, pair_batch // max(n_seg, 1))
+    for start in range(0, len(valid), step):
+        rows = valid[start:start + step]
+        point = np.repeat(rows, n_seg)
+        segment = np.tile(np.arange(n_seg), len(rows))
+        km[rows] = _nearest_pairs(seg, lon, lat, point, segment).reshape(len(rows), n_seg).min(axis=1)
+    for i in seg['polygons']:
+        km[valid[shapely.contains_xy(seg['polygon_geoms'][i], lon[valid], lat[valid])]] = 0.0
+    return km
+
+
+def check_nearest(lon, lat, tolerance_km=1e-6):
+    # Jumlah kejadian yang jaraknya berbeda dari pencarian menyeluruh, per layer
+    return {
+        key: int(np.sum(~np.isclose(nearest_fault(key, lon, lat)[0], nearest_fault_exact(key, lon, lat),
+                                    rtol=0, atol=tolerance_km, equal_nan=True)))
+        for key in FAULT_LAYERS
+    }
+
+
+def add_fault_columns(gdf):
+    lon = gdf['longitude'].to_numpy(dtype=float)
+    lat = gdf['latitude'].to_numpy(dtype=float)
+    for key in FAULT_LAYERS:
+        km, names = nearest_fault(key, lon, lat)
+        gdf[f'{key}_km'] = km.astype('float32')
+        gdf[f'{key}_name'] = names
+        gdf[f'{key}_name'] = gdf[f'{key}_name'].astype('category')
+    gdf['fault_km'] = np.fmin(*(gdf[f'{key}_km'] for key in FAULT_LAYERS)).astype('float32')
+    return gdf
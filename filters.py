@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+
+from faults import FAULT_DISTANCE_COLUMNS
+from spatial import EventIndex
+
+# Peta hanya memuat kejadian di area yang terlihat plus margin (fraksi lebar/tinggi
+# viewport di tiap sisi). Kotak query dibulatkan ke grid selebar satu tile (256 px)
+# sehingga geseran kecil tetap memakai layer yang sama.
+VIEWPORT_MARGIN = 0.5
+# Batas jumlah kejadian di peta per level zoom (zoom <= kunci); magnitudo terbesar didahulukan
+VIEWPORT_LIMITS = {5: 2000, 7: 5000, 9: 10000, None: 20000}
+
+
+class Partition:
+    # Satu partisi tahun: posisi baris plus urutan magnitudo/kedalaman yang sudah diurutkan
+
+    def __init__(self, rows, mag, depth):
+        self.rows = rows
+        self.mag = mag[rows]
+        self.depth = depth[rows]
+        self.mag_order = np.argsort(self.mag, kind='stable')
+        self.mag_sorted = self.mag[self.mag_order]
+        self.depth_order = np.argsort(self.depth, kind='stable')
+        self.depth_sorted = self.depth[self.depth_order]
+
+    def query(self, mag_range, depth_range):
+        # Rentang inklusif lewat searchsorted; NaN berada di ujung sehingga tidak ikut
+        m_lo = np.searchsorted(self.mag_sorted, mag_range[0], side='left')
+        m_hi = np.searchsorted(self.mag_sorted, mag_range[1], side='right')
+        d_lo = np.searchsorted(self.depth_sorted, depth_range[0], side='left')
+        d_hi = np.searchsorted(self.depth_sorted, depth_range[1], side='right')
+
+        # Mulai dari rentang yang lebih sempit, lalu cek kolom lainnya langsung
+        if m_hi - m_lo <= d_hi - d_lo:
+            local = self.mag_order[m_lo:m_hi]
+            values = self.depth[local]
+            local = local[(values >= depth_range[0]) & (values <= depth_range[1])]
+        else:
+            local = self.depth_order[d_lo:d_hi]
+            values = self.mag[local]
+            local = local[(values >= mag_range[0]) & (values <= mag_range[1])]
+        local.sort()
+        return self.rows[local]
+
+
+class FilterEngine:
+    # Katalog dipartisi per tahun saat dimuat; filter mengembalikan posisi baris (iloc)
+    # tanpa menyalin GeoDataFrame
+
+    def __init__(self, gdf):
+        mag = gdf['mag'].to_numpy(dtype=float)
+        depth = gdf['depth'].to_numpy(dtype=float)
+        years = gdf['year'].to_numpy()
+
+        order = np.argsort(years, kind='stable')
+        keys, starts = np.unique(years[order], return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+        self.partitions = {
+            int(year): Partition(order[start:end], mag, depth)
+            for year, start, end in zip(keys, starts, bounds)
+        }
+        # Partisi None = semua tahun
+        self.partitions[None] = Partition(np.arange(len(gdf)), mag, depth)
+        self.mag = mag
+        self.index = EventIndex.from_frame(gdf)
+        # Jarak ke patahan/megathrust terdekat (km) per jenis sumber, lihat faults.py
+        self.fault_km = {
+            key: gdf[col].to_numpy(dtype=float) for key, col in FAULT_DISTANCE_COLUMNS.items()
+        }
+
+    @property
+    def years(self):
+        return sorted((y for y in self.partitions if y is not None), reverse=True)
+
+    def query(self, year=None, mag_range=None, depth_range=None, lat_range=None, lon_range=None,
+              fault=None):
+        # fault = (jenis sumber, jarak maksimum km), jenis = kunci FAULT_DISTANCE_COLUMNS
+        partition = self.partitions.get(None if year is None else int(year))
+        if partition is None:
+            return np.array([], dtype=np.int64)
+
+        rows = partition.query(
+            mag_range if mag_range is not None else (-np.inf, np.inf),
+            depth_range if depth_range is not None else (-np.inf, np.inf),
+        )
+        if fault is not None:
+            # NaN (koordinat kosong) tidak lolos, sama seperti filter rentang lain
+            key, max_km = fault
+            rows = rows[self.fault_km[key][rows] <= max_km]
+        if lat_range is None and lon_range is None:
+            return rows
+
+        lat_range = lat_range if lat_range is not None else (-90, 90)
+        lon_range = lon_range if lon_range is not None else (-180, 180)
+        bbox = (lon_range[0], lat_range[0], lon_range[1], lat_range[1])
+        if len(rows) <= self.index.box_fraction(*bbox) * len(self.index):
+            # Hasil filter lain lebih kecil dari isi kotak, cek koordinatnya langsung
+            lon, lat = self.index.lon[rows], self.index.lat[rows]
+            return rows[
+                (lat >= lat_range[0]) & (lat <= lat_range[1])
+                & (lon >= lon_range[0]) & (lon <= lon_range[1])
+            ]
+
+        in_box = self.index.query_bbox(*bbox)
+        if len(in_box) == len(self.index):
+            return rows
+        return np.intersect1d(rows, in_box, assume_unique=True)
+
+
+def filter_events(engine, year, mag_range, depth_range, lat_range, lon_range, fault=None):
+    # Filter yang dipakai dashboard (app.py), semantik sama dengan mask boolean lama
+    return engine.query(
+        year=year,
+        mag_range=mag_range,
+        depth_range=depth_range,
+        lat_range=lat_range,
+        lon_range=lon_range,
+        fault=fault,
+    )
+
+
+def viewport_limit(zoom):
+    for max_zoom, limit in VIEWPORT_LIMITS.items():
+        if max_zoom is None or zoom <= max_zoom:
+            return limit
+
+
+def viewport_box(bounds, zoom, margin=VIEWPORT_MARGIN):
+    # bounds = (lon_min, lat_min, lon_max, lat_max) dari peta; hasil diperluas margin
+    # lalu dibulatkan keluar ke kelipatan lebar tile pada zoom tersebut
+    lon_min, lat_min, lon_max, lat_max = bounds
+    pad_lon = (lon_max - lon_min) * margin
+    pad_lat = (lat_max - lat_min) * margin
+    step = 360 / 2 ** zoom
+    return (
+        max(-180.0, math.floor((lon_min - pad_lon) / step) * step),
+        max(-90.0, math.floor((lat_min - pad_lat) / step) * step),
+        min(180.0, math.ceil((lon_max + pad_lon) / step) * step),
+        min(90.0, math.ceil((lat_max + pad_lat) / step) * step),
+    )
+
+
+def viewport_rows(engine, rows, box=None, limit=None):
+    # Bagian hasil filter (posisi baris) yang masuk kotak viewport, dibatasi `limit`
+    # kejadian dengan magnitudo terbesar. Urutan katalog dipertahankan.
+    if box is not None:
+        lon, lat = engine.index.lon[rows], engine.index.lat[rows]
+        rows = rows[
+            (lon >= box[0]) & (lon <= box[2]) & (lat >= box[1]) & (lat <= box[3])
+        ]
+    if limit is not None and len(rows) > limit:
+        mag = np.nan_to_num(engine.mag[rows], nan=-np.inf)
+        rows = np.sort(rows[np.argsort(-mag, kind='stable')[:limit]])
+    return rows
@@ -0,0 +1,692 @@
+import base64
+import json
+from functools import lru_cache
+
+import folium
+import matplotlib.pyplot as plt
+import numpy as np
+from branca.element import Template
+from folium.map import Layer
+from folium.plugins import VectorGridProtobuf
+from jinja2.utils import htmlsafe_json_dumps
+
+from overlays import OVERLAYS, load_overlay_frame
+
+
+@lru_cache(maxsize=None)
+def load_overlay(key):
+    # GeoJSON layer overlays.OVERLAYS, hasil serialisasi di-cache untuk semua sesi
+    return load_overlay_frame(key).to_json()
+
+
+def add_overlay(m, key):
+    overlay = OVERLAYS[key]
+    style = overlay['style']
+    folium.GeoJson(
+        load_overlay(key),
+        name=overlay['name'],
+        style_function=lambda x: style,
+        tooltip=folium.GeoJsonTooltip(
+            fields=overlay['fields'],
+            aliases=overlay['aliases'],
+            localize=True
+        )
+    ).add_to(m)
+
+
+# Warna marker berdasarkan kedalaman (km)
+DEPTH_CMAP = 'gist_rainbow'
+DEPTH_RANGE = (20, 100)
+
+# Ukuran marker berdasarkan magnitudo
+MIN_RADIUS = 5
+MAX_RADIUS = 20
+
+# Jarak ke patahan/megathrust di popup dibulatkan ke km; lebih jauh dari ini "> N km"
+FAULT_KM_MAX = 250
+
+POPUP_TEMPLATE = """
+<div style="font-family:Arial, sans-serif; font-size:13px; line-height:1.5;">
+    <div style="background-color:#d4edda; color:#155724; padding:4px 8px; border-radius:6px; display:inline-block; font-weight:bold;">
+        Data Gempa
+    </div>
+    <div style="margin-top:8px; color:#6c757d;">{time_wib} WIB</div>
+    <div style="margin-top:8px; font-size:15px; font-weight:bold; color:#000;">
+        Pusat gempa berada di {place}
+    </div>
+    <div style="margin-top:12px; padding:8px; background:#f8f9fa; border-radius:10px;">
+        <div style="display:flex; justify-content:space-between;">
+            <div>🔴 <b>Magnitudo:</b></div>
+            <div><b>{mag}</b></div>
+        </div>
+        <div style="display:flex; justify-content:space-between; margin-top:4px;">
+            <div>🟢 <b>Kedalaman:</b></div>
+            <div><b>{depth} km</b></div>
+        </div>
+        <div style="display:flex; justify-content:space-between; margin-top:4px;">
+            <div>📍 <b>Lokasi:</b></div>
+            <div><b>{lat} LS - {lon} BT</b></div>
+        </div>
+        <div style="display:flex; justify-content:space-between; margin-top:4px;">
+            <div>〰️ <b>Patahan terdekat:</b></div>
+            <div><b>{patahan}</b></div>
+        </div>
+        <div style="display:flex; justify-content:space-between; margin-top:4px;">
+            <div>🌊 <b>Megathrust terdekat:</b></div>
+            <div><b>{megathrust}</b></div>
+        </div>
+    </div>
+</div>
+"""
+
+# Fungsi JS pengisi template popup, dipakai semua layer kejadian
+POPUP_RENDER_JS = """
+function (tpl, p, lat, lon) {
+    // Jarak ke sumber terdekat (lihat faults.py), 0 km = di dalam zona
+    function fault(km, name) {
+        if (km === null || km === undefined) return '-';
+        return (km > %d ? '> %d' : Math.round(km)) + ' km' + (name ? ' (' + name + ')' : '');
+    }
+    var values = {
+        // WIB = UTC+7 tanpa daylight saving
+        time_wib: new Date(p.epoch_ms + 7 * 3600 * 1000).toISOString().slice(0, 19).replace('T', ' '),
+        place: p.place,
+        mag: p.mag,
+        depth: Math.trunc(p.depth),
+        lat: Math.round(lat * 100) / 100,
+        lon: Math.round(lon * 100) / 100,
+        patahan: fault(p.patahan_km, p.patahan_name),
+        megathrust: fault(p.megathrust_km, p.megathrust_name)
+    };
+    return tpl.replace(/\\{(\\w+)\\}/g, function (_, key) {
+        return String(values[key]).replace(/[&<>"]/g, function (ch) {
+            return '&#' + ch.charCodeAt(0) + ';';
+        });
+    });
+}
+""" % (FAULT_KM_MAX, FAULT_KM_MAX)
+
+
+@lru_cache(maxsize=None)
+def depth_color_lut():
+    # Tabel warna hex dari colormap, dihitung sekali
+    cmap = plt.get_cmap(DEPTH_CMAP)
+    rgb = (cmap(np.arange(cmap.N))[:, :3] * 255).astype(int)
+    return np.array([f'#{r:02x}{g:02x}{b:02x}' for r, g, b in rgb])
+
+
+def depth_color_index(depth):
+    # Posisi warna di depth_color_lut() untuk setiap kedalaman
+    n = len(depth_color_lut())
+    vmin, vmax = DEPTH_RANGE
+    scaled = (np.asarray(depth, dtype=float) - vmin) / (vmax - vmin) * n
+    return np.clip(np.nan_to_num(scaled), 0, n - 1).astype(int)
+
+
+def depth_colors(depth):
+    # Sama dengan cmap(Normalize(20, 100)(depth)), tapi untuk semua baris sekaligus
+    return depth_color_lut()[depth_color_index(depth)]
+
+
+def marker_radius(mag, mag_min, mag_max):
+    span = (mag_max - mag_min) or 1.0
+    scale = (np.asarray(mag, dtype=float) - mag_min) / span
+    return (MIN_RADIUS + (MAX_RADIUS - MIN_RADIUS) * scale).astype(int)
+
+
+# Warna peta b-value (lihat bvalue.py): b rendah merah, b tinggi biru
+BVALUE_CMAP = 'RdYlBu'
+BVALUE_RANGE = (0.6, 1.4)
+BVALUE_OPACITY = 0.6
+
+
+def bvalue_image(b):
+    # Grid b-value (baris = lintang naik) -> gambar RGBA dengan utara di atas;
+    # sel tanpa nilai transparan
+    vmin, vmax = BVALUE_RANGE
+    rgba = plt.get_cmap(BVALUE_CMAP)(np.clip((b - vmin) / (vmax - vmin), 0, 1))
+    rgba[..., 3] = np.isfinite(b)
+    return rgba[::-1]
+
+
+# Warna peta kepadatan (lihat density.py): skala log, DENSITY_DECADES orde di bawah
+# nilai tertinggi; bagian yang lebih rendah makin transparan
+DENSITY_CMAP = 'inferno'
+DENSITY_DECADES = 3
+DENSITY_OPACITY = 0.7
+
+
+def density_image(density):
+    top = np.nanmax(density) if density.size else 0
+    if not top > 0:
+        return np.zeros(density.shape + (4,))
+    with np.errstate(divide='ignore'):
+        scaled = (np.log10(density / top) + DENSITY_DECADES) / DENSITY_DECADES
+    scaled = np.clip(np.nan_to_num(scaled, nan=0, neginf=0), 0, 1)
+    rgba = plt.get_cmap(DENSITY_CMAP)(scaled)
+    rgba[..., 3] = scaled
+    return rgba[::-1]
+
+
+# Format ringkas data kejadian untuk browser: kolom typed array (base64, little-endian),
+# koordinat dikuantisasi 5 desimal, gaya marker dan nama lokasi lewat tabel bersama.
+COORD_SCALE = 10 ** 5
+MAG_SCALE = 100
+MISSING_INT16 = -32768
+MISSING_UINT8 = 255
+# Anggaran payload kejadian per 10k kejadian (dicek benchmark.py --check-budget);
+# peta di atas ~1 MB terasa lambat di jaringan kantor
+PAYLOAD_BUDGET_PER_10K = 400 * 2 ** 10
+
+WIRE_ARRAYS = {
+    'u1': 'Uint8Array', 'u2': 'Uint16Array', 'u4': 'Uint32Array',
+    'i2': 'Int16Array', 'i4': 'Int32Array',
+}
+
+
+def wire_column(values, dtype):
+    arr = np.ascontiguousarray(values, dtype='<' + dtype)
+    return {'type': dtype, 'data': base64.b64encode(arr.tobytes()).decode('ascii')}
+
+
+# Pasangan wire_column di browser: {type, data} -> typed array. Dipakai EVENT_DECODE_JS
+# dan PlaybackLayer
+WIRE_COLUMN_JS = """
+(function () {
+    var arrays = {%s};
+    return function (c) {
+        var s = atob(c.data), bytes = new Uint8Array(s.length);
+        for (var i = 0; i < s.length; i++) bytes[i] = s.charCodeAt(i);
+        return new arrays[c.type](bytes.buffer);
+    };
+})()
+""" % ', '.join(f'{k}: {v}' for k, v in WIRE_ARRAYS.items())
+
+
+def _codes(values):
+    # Kode kamus dengan tipe integer terkecil yang cukup
+    uniques, codes = np.unique(values, return_inverse=True)
+    dtype = 'u1' if len(uniques) <= 2 ** 8 else 'u2' if len(uniques) <= 2 ** 16 else 'u4'
+    return uniques, wire_column(codes, dtype)
+
+
+def _category_codes(series):
+    # Seperti _codes untuk kolom kategori: hanya kode integer yang di-unique, bukan teks
+    categories = series.cat.categories.to_numpy()
+    used, codes = _codes(series.cat.codes.to_numpy())
+    return categories[used], codes
+
+
+def wire_int16(values, scale=1):
+    values = np.asarray(values, dtype=float) * scale
+    return np.where(np.isnan(values), MISSING_INT16, np.round(values)).astype(np.int16)
+
+
+def encode_events(data, mag_min, mag_max):
+    # Properti mentah saja; HTML popup dibuat di browser saat popup dibuka
+    depth = data['depth'].to_numpy(dtype=float)
+    radius = np.clip(marker_radius(data['mag'].to_numpy(), mag_min, mag_max), 0, MAX_RADIUS)
+    styles, style = _codes(depth_color_index(depth) * (MAX_RADIUS + 1) + radius)
+    lut = depth_color_lut()
+
+    # Lokasi sudah dipecah saat ingest (catalog.add_place_columns): kamus "20 km W"
+    # + kamus "Sidareja, Indonesia", hanya kategori yang dipakai kejadian ini yang dikirim
+    prefixes, prefix_codes = _category_codes(data['place_prefix'])
+    localities, locality_codes = _category_codes(data['place_locality'])
+
+    # Jarak (km) ke sumber terdekat per layer overlay (kolom dari faults.py), plus kamus
+    # pasangan nama [patahan, megathrust] terdekat; satu kode per kejadian
+    faults = {}
+    pair = np.zeros(len(data), dtype=np.int64)
+    categories = []
+    for key in OVERLAYS:
+        km = np.round(np.minimum(data[f'{key}_km'].to_numpy(dtype=float), FAULT_KM_MAX + 1))
+        faults[f'{key}_km'] = wire_column(np.where(np.isnan(km), MISSING_UINT8, km), 'u1')
+        names = data[f'{key}_name'].astype('category').cat
+        pair = pair * (len(names.categories) + 1) + names.codes.to_numpy() + 1
+        categories.append([''] + names.categories.astype(str).tolist())
+    pairs, faults['fault_name'] = _codes(pair)
+    faults['fault_names'] = []
+    for code in pairs.tolist():
+        names = []
+        for labels in reversed(categories):
+            code, k = divmod(code, len(labels))
+            names.append(labels[k])
+        faults['fault_names'].append(names[::-1])
+
+    seconds = data['epoch_ms'].to_numpy() // 1000
+    t0 = int(seconds.min()) if len(seconds) else 0
+    return {
+        'n': len(data),
+        'lon': wire_column(np.round(data['longitude'].to_numpy(dtype=float) * COORD_SCALE), 'i4'),
+        'lat': wire_column(np.round(data['latitude'].to_numpy(dtype=float) * COORD_SCALE), 'i4'),
+        'styles': [[lut[k // (MAX_RADIUS + 1)], int(k % (MAX_RADIUS + 1))] for k in styles.tolist()],
+        'style': style,
+        't0': t0,
+        't': wire_column(seconds - t0, 'u4'),
+        'mag': wire_column(wire_int16(data['mag'].to_numpy(), MAG_SCALE), 'i2'),
+        # Popup hanya menampilkan kedalaman bulat (km)
+        'depth': wire_column(wire_int16(np.trunc(depth)), 'i2'),
+        'prefixes': prefixes.tolist(),
+        'prefix': prefix_codes,
+        'localities': localities.tolist(),
+        'locality': locality_codes,
+        **faults,
+    }
+
+
+# Decoder format di atas; dipanggil sekali, hasilnya kolom typed array
+EVENT_DECODE_JS = """
+function (enc) {
+    var column = %s;
+    var cols = {n: enc.n, styles: enc.styles, prefixes: enc.prefixes, localities: enc.localities};
+    ['lon', 'lat', 'style', 't', 'mag', 'depth', 'prefix', 'locality'].forEach(function (key) {
+        cols[key] = column(enc[key]);
+    });
+    var faults = %s;
+    faults.forEach(function (key) {
+        cols[key + '_km'] = column(enc[key + '_km']);
+    });
+    cols.fault_name = column(enc.fault_name);
+    // Dipakai juga untuk data lain dengan format yang sama (agregat cluster)
+    cols.column = column;
+    // Properti satu kejadian untuk popup, dibuat hanya saat popup dibuka
+    cols.properties = function (i) {
+        var prefix = enc.prefixes[cols.prefix[i]];
+        var p = {
+            epoch_ms: (enc.t0 + cols.t[i]) * 1000,
+            place: (prefix ? prefix + ' of ' : '') + enc.localities[cols.locality[i]],
+            mag: cols.mag[i] === %d ? null : cols.mag[i] / %d,
+            depth: cols.depth[i] === %d ? null : cols.depth[i]
+        };
+        faults.forEach(function (key, k) {
+            var km = cols[key + '_km'][i];
+            p[key + '_km'] = km === %d ? null : km;
+            p[key + '_name'] = enc.fault_names[cols.fault_name[i]][k];
+        });
+        return p;
+    };
+    return cols;
+}
+""" % (
+    WIRE_COLUMN_JS.strip(),
+    json.dumps(list(OVERLAYS)),
+    MISSING_INT16, MAG_SCALE, MISSING_INT16,
+    MISSING_UINT8,
+)
+
+
+# Mode cluster: kejadian digabung per sel grid, ukuran sel mengikuti zoom
+CLUSTER_MIN_ZOOM = 3
+CLUSTER_DETAIL_ZOOM = 9
+CLUSTER_CELL_PX = 64
+
+
+def cluster_level(data, zoom):
+    # Agregasi grid untuk satu level zoom: jumlah, magnitudo maks, kedalaman rata-rata
+    cell = 360 / 2 ** zoom * CLUSTER_CELL_PX / 256
+    lon = data['longitude'].to_numpy()
+    lat = data['latitude'].to_numpy()
+    ix = np.floor(lon / cell).astype(np.int64)
+    iy = np.floor(lat / cell).astype(np.int64)
+    keys, inverse = np.unique(ix * (1 << 32) + iy, return_inverse=True)
+
+    count = np.bincount(inverse, minlength=len(keys))
+    mag_max = np.full(len(keys), -np.inf)
+    np.maximum.at(mag_max, inverse, np.nan_to_num(data['mag'].to_numpy(), nan=-np.inf))
+    depth_mean = np.bincount(inverse, weights=np.nan_to_num(data['depth'].to_numpy()), minlength=len(keys)) / count
+    mag_max[np.isinf(mag_max)] = np.nan
+    colors, color = np.unique(depth_color_index(depth_mean), return_inverse=True)
+    # Format ringkas yang sama dengan encode_events
+    return {
+        'n': len(keys),
+        # Posisi cluster di titik berat kejadiannya
+        'lon': wire_column(np.round(np.bincount(inverse, weights=lon, minlength=len(keys)) / count * COORD_SCALE), 'i4'),
+        'lat': wire_column(np.round(np.bincount(inverse, weights=lat, minlength=len(keys)) / count * COORD_SCALE), 'i4'),
+        'count': wire_column(count, 'u4'),
+        'mag_max': wire_column(wire_int16(np.round(mag_max, 1), MAG_SCALE), 'i2'),
+        'depth_mean': wire_column(wire_int16(np.round(depth_mean, 1), 10), 'i2'),
+        'colors': depth_color_lut()[colors].tolist(),
+        'color': wire_column(color, 'u1'),
+    }
+
+
+def cluster_pyramid(data, min_zoom=CLUSTER_MIN_ZOOM, detail_zoom=CLUSTER_DETAIL_ZOOM):
+    return {zoom: cluster_level(data, zoom) for zoom in range(min_zoom, detail_zoom)}
+
+
+class EventLayer(Layer):
+    # Semua kejadian gempa dalam satu layer; data dikirim ringkas (encode_events),
+    # didekode sekali lalu marker dibuat di browser
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }}_cols = ({{ this.decode_js }})({{ this.data }});
+            var {{ this.get_name() }} = L.featureGroup();
+            (function (cols) {
+                for (var i = 0; i < cols.n; i++) {
+                    var style = cols.styles[cols.style[i]];
+                    var marker = L.circleMarker([cols.lat[i] / {{ this.coord_scale }}, cols.lon[i] / {{ this.coord_scale }}], {
+                        radius: style[1],
+                        color: 'black',
+                        weight: 1,
+                        fill: true,
+                        fillColor: style[0],
+                        fillOpacity: 0.8
+                    });
+                    marker.event_index = i;
+                    marker.bindPopup({{ this.get_name() }}_popup, {maxWidth: 300});
+                    {{ this.get_name() }}.addLayer(marker);
+                }
+            })({{ this.get_name() }}_cols);
+            {%- if this.clusters %}
+
+            // Mode cluster: tampilkan agregat grid, kejadian individual hanya saat zoom dekat.
+            // Peta diambil saat layer ditambahkan, jadi layer bisa berada di dalam feature group.
+            var {{ this.get_name() }}_events = {{ this.get_name() }};
+            var {{ this.get_name() }}_clusters = {{ this.clusters }};
+            {{ this.get_name() }} = L.layerGroup();
+            // Level didekode saat pertama kali ditampilkan
+            function {{ this.get_name() }}_level(zoom) {
+                var level = {{ this.get_name() }}_clusters[zoom];
+                if (!level.decoded) {
+                    ['lon', 'lat', 'count', 'mag_max', 'depth_mean', 'color'].forEach(function (key) {
+                        level[key] = {{ this.get_name() }}_cols.column(level[key]);
+                    });
+                    level.decoded = true;
+                }
+                return level;
+            }
+            function {{ this.get_name() }}_update() {
+                var map = {{ this.get_name() }}._map;
+                if (!map) {
+                    return;
+                }
+                var zoom = map.getZoom();
+                {{ this.get_name() }}.clearLayers();
+                if (zoom >= {{ this.detail_zoom }}) {
+                    {{ this.get_name() }}.addLayer({{ this.get_name() }}_events);
+                    return;
+                }
+                var level = {{ this.get_name() }}_level(Math.max(zoom, {{ this.min_zoom }}));
+                for (var i = 0; i < level.n; i++) {
+                    var mag = level.mag_max[i] === {{ this.missing }} ? '-' : level.mag_max[i] / {{ this.mag_scale }};
+                    L.circleMarker([level.lat[i] / {{ this.coord_scale }}, level.lon[i] / {{ this.coord_scale }}], {
+                        radius: Math.min(30, 6 + 3 * Math.log2(level.count[i])),
+                        color: 'black',
+                        weight: 1,
+                        fill: true,
+                        fillColor: level.colors[level.color[i]],
+                        fillOpacity: 0.8
+                    }).bindTooltip(
+                        level.count[i] + ' kejadian<br>M maks: ' + mag +
+                        '<br>Kedalaman rata-rata: ' + level.depth_mean[i] / 10 + ' km'
+                    ).addTo({{ this.get_name() }});
+                }
+            }
+            {{ this.get_name() }}.on('add', function () {
+                this._map.on('zoomend', {{ this.get_name() }}_update);
+                {{ this.get_name() }}_update();
+            });
+            {{ this.get_name() }}.on('remove', function () {
+                this._map.off('zoomend', {{ this.get_name() }}_update);
+            });
+            {%- endif %}
+
+            // Template popup dikirim sekali, diisi saat popup dibuka
+            var {{ this.get_name() }}_render = {{ this.popup_render_js }};
+            function {{ this.get_name() }}_popup(layer) {
+                var ll = layer.getLatLng();
+                return {{ this.get_name() }}_render(
+                    {{ this.popup_template|tojson }},
+                    {{ this.get_name() }}_cols.properties(layer.event_index), ll.lat, ll.lng
+                );
+            }
+        {% endmacro %}
+    """)
+
+    def __init__(self, data, mag_min, mag_max, name='Kejadian Gempa', show=True, cluster=False,
+                 min_zoom=CLUSTER_MIN_ZOOM, detail_zoom=CLUSTER_DETAIL_ZOOM, cluster_data=None):
+        super().__init__(name=name, overlay=True, control=True, show=show)
+        self._name = 'EventLayer'
+        # Diserialisasi sekali di sini supaya ukuran payload bisa dibaca tanpa render ulang
+        self.data = htmlsafe_json_dumps(encode_events(data, mag_min, mag_max))
+        self.decode_js = EVENT_DECODE_JS
+        self.coord_scale = COORD_SCALE
+        self.mag_scale = MAG_SCALE
+        self.missing = MISSING_INT16
+        self.popup_template = POPUP_TEMPLATE
+        self.popup_render_js = POPUP_RENDER_JS
+        self.min_zoom = min_zoom
+        self.detail_zoom = detail_zoom
+        # Agregat cluster bisa dihitung dari kejadian yang lebih luas daripada marker
+        # yang dikirim (misal semua hasil filter, sementara marker hanya di viewport)
+        self.clusters = htmlsafe_json_dumps(
+            cluster_pyramid(data if cluster_data is None else cluster_data, min_zoom, detail_zoom)
+        ) if cluster else None
+
+    @property
+    def payload_bytes(self):
+        return len(self.data) + (len(self.clusters) if self.clusters else 0)
+
+
+class EventTileLayer(VectorGridProtobuf):
+    # Kejadian gempa dari server tile vektor lokal; filter sudah diterapkan di server
+    # (ada di URL tile), jadi batas kejadian per tile berlaku setelah filter
+    _template = Template("""
+        {% macro script(this, kwargs) -%}
+            var {{ this.get_name() }}_render = {{ this.popup_render_js }};
+            var {{ this.get_name() }} = L.vectorGrid.protobuf('{{ this.url }}', {
+                interactive: true,
+                maxNativeZoom: {{ this.max_native_zoom }},
+                vectorTileLayerStyles: {
+                    events: function (p) {
+                        return {
+                            radius: p.radius,
+                            color: 'black',
+                            weight: 1,
+                            fill: true,
+                            fillColor: p.color,
+                            fillOpacity: 0.8
+                        };
+                    }
+                }
+            });
+            {{ this.get_name() }}.on('click', function (e) {
+                var p = e.layer.properties;
+                L.popup({maxWidth: 300})
+                    .setLatLng([p.lat, p.lon])
+                    .setContent({{ this.get_name() }}_render({{ this.popup_template|tojson }}, p, p.lat, p.lon))
+                    .openOn({{ this._parent.get_name() }});
+            });
+        {%- endmacro %}
+    """)
+
+    def __init__(self, url, name='Kejadian Gempa', max_native_zoom=14, show=True):
+        super().__init__(url, name=name, show=show)
+        self._name = 'EventTileLayer'
+        self.max_native_zoom = max_native_zoom
+        self.popup_template = POPUP_TEMPLATE
+        self.popup_render_js = POPUP_RENDER_JS
+
+
+def add_overlay_tiles(m, key, url, max_native_zoom=14):
+    overlay = OVERLAYS[key]
+    VectorGridProtobuf(
+        url,
+        name=overlay['name'],
+        options={
+            'maxNativeZoom': max_native_zoom,
+            'vectorTileLayerStyles': {key: overlay['style']},
+        }
+    ).add_to(m)
+
+
+class PlaybackLayer(Layer):
+    # Putar ulang kejadian per frame waktu (playback.py). Di awal hanya jumlah kejadian
+    # per frame yang dikirim; isi frame diambil dari server tile lokal saat diputar,
+    # beberapa frame berikutnya diambil lebih dulu. Frame sebelumnya tetap tampil memudar.
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.layerGroup();
+            (function (layer, config) {
+                var column = {{ this.column_js }};
+                var colors = {{ this.colors|tojson }};
+                var counts = column(config.counts);
+                var renderer = L.canvas();
+                var frames = {}, shown = [], current = 0, timer = null;
+
+                function frameStart(i) {
+                    // Awal frame ke-i dalam jam WIB (dibaca lewat getUTC*)
+                    var d = new Date(config.start + config.offset);
+                    if (config.unit === 'D') d.setUTCDate(d.getUTCDate() + i);
+                    if (config.unit === 'M') d.setUTCMonth(d.getUTCMonth() + i);
+                    if (config.unit === 'Y') d.setUTCFullYear(d.getUTCFullYear() + i);
+                    return d;
+                }
+                function label(i) {
+                    var text = frameStart(i).toISOString().slice(0, {'D': 10, 'M': 7, 'Y': 4}[config.unit]);
+                    return text + ' WIB (' + counts[i] + ' kejadian)';
+                }
+                function fetchFrame(i) {
+                    if (i >= config.frames || frames[i]) {
+                        return frames[i];
+                    }
+                    if (!counts[i]) {
+                        frames[i] = Promise.resolve(null);
+                    } else {
+                        frames[i] = fetch('{{ this.url }}'.replace('{i}', i))
+                            .then(function (r) { return r.ok ? r.json() : null; })
+                            .catch(function () { return null; });
+                    }
+                    return frames[i];
+                }
+                function draw(i, enc) {
+                    var group = L.layerGroup();
+                    if (enc) {
+                        var c = {};
+                        ['lon', 'lat', 'mag', 'depth', 't', 'color', 'radius'].forEach(function (key) {
+                            c[key] = column(enc[key]);
+                        });
+                        for (var k = 0; k < enc.n; k++) {
+                            var time = new Date(enc.start + c.t[k] * 1000 + config.offset);
+                            L.circleMarker([c.lat[k] / {{ this.coord_scale }}, c.lon[k] / {{ this.coord_scale }}], {
+                                renderer: renderer,
+                                radius: c.radius[k],
+                                color: 'black',
+                                weight: 1,
+                                fill: true,
+                                fillColor: colors[c.color[k]],
+                                fillOpacity: 0.8
+                            }).bindTooltip(
+                                time.toISOString().slice(0, 19).replace('T', ' ') + ' WIB<br>M: ' +
+                                (c.mag[k] === {{ this.missing }} ? '-' : c.mag[k] / {{ this.mag_scale }}) +
+                                '<br>Kedalaman: ' + (c.depth[k] === {{ this.missing }} ? '-' : c.depth[k]) + ' km'
+                            ).addTo(group);
+                        }
+                    }
+                    group.addTo(layer);
+                    shown.push({index: i, group: group});
+                    // Jejak: frame lama memudar, yang lewat batas dibuang
+                    while (shown.length > config.trail + 1) {
+                        layer.removeLayer(shown.shift().group);
+                    }
+                    shown.forEach(function (s, k) {
+                        var opacity = (k + 1) / shown.length;
+                        s.group.eachLayer(function (m) {
+                            m.setStyle({opacity: opacity, fillOpacity: 0.8 * opacity});
+                        });
+                    });
+                }
+                function show(i) {
+                    current = i;
+                    slider.value = i;
+                    text.innerHTML = label(i);
+                    for (var k = 1; k <= config.prefetch; k++) {
+                        fetchFrame(i + k);
+                    }
+                    // Isi frame yang sudah tidak dekat posisi putar dilepas
+                    Object.keys(frames).forEach(function (k) {
+                        if (k < i - config.trail || k > i + config.prefetch) delete frames[k];
+                    });
+                    return fetchFrame(i).then(function (enc) {
+                        if (current === i) draw(i, enc);
+                    });
+                }
+                function seek(i) {
+                    shown.forEach(function (s) { layer.removeLayer(s.group); });
+                    shown = [];
+                    show(i);
+                }
+                function step() {
+                    if (current + 1 >= config.frames) {
+                        stop();
+                        return;
+                    }
+                    show(current + 1).then(function () {
+                        if (timer) timer = setTimeout(step, config.interval);
+                    });
+                }
+                function stop() {
+                    clearTimeout(timer);
+                    timer = null;
+                    button.innerHTML = '&#9654;';
+                }
+
+                var control = L.control({position: 'bottomleft'});
+                var container = L.DomUtil.create('div', 'leaflet-bar');
+                container.style.cssText = 'background: white; padding: 4px 8px; font: 12px sans-serif;';
+                var button = L.DomUtil.create('a', '', container);
+                button.href = '#';
+                button.innerHTML = '&#9654;';
+                button.style.cssText = 'display: inline-block; vertical-align: middle;';
+                var slider = L.DomUtil.create('input', '', container);
+                slider.type = 'range';
+                slider.min = 0;
+                slider.max = Math.max(config.frames - 1, 0);
+                slider.value = 0;
+                slider.style.cssText = 'width: 240px; vertical-align: middle;';
+                var text = L.DomUtil.create('span', '', container);
+                text.style.cssText = 'margin-left: 6px; vertical-align: middle;';
+                L.DomEvent.disableClickPropagation(container);
+                L.DomEvent.disableScrollPropagation(container);
+                L.DomEvent.on(button, 'click', function (e) {
+                    L.DomEvent.preventDefault(e);
+                    if (timer) {
+                        stop();
+                    } else if (config.frames) {
+                        if (current + 1 >= config.frames) seek(0);
+                        button.innerHTML = '&#10074;&#10074;';
+                        timer = setTimeout(step, config.interval);
+                    }
+                });
+                L.DomEvent.on(slider, 'input', function () {
+                    seek(parseInt(slider.value, 10));
+                });
+                control.onAdd = function () { return container; };
+
+                layer.on('add', function () {
+                    control.addTo(this._map);
+                    if (config.frames) seek(current);
+                });
+                layer.on('remove', function () {
+                    stop();
+                    control.remove();
+                });
+            })({{ this.get_name() }}, {{ this.config }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, playback, url, name='Kejadian Gempa', show=True):
+        super().__init__(name=name, overlay=True, control=True, show=show)
+        self._name = 'PlaybackLayer'
+        self.config = htmlsafe_json_dumps(playback.config())
+        self.url = url
+        self.column_js = WIRE_COLUMN_JS.strip()
+        self.colors = depth_color_lut().tolist()
+        self.coord_scale = COORD_SCALE
+        self.mag_scale = MAG_SCALE
+        self.missing = MISSING_INT16
+
+    @property
+    def payload_bytes(self):
+        return len(self.config)
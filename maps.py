@@ -0,0 +1,198 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+import folium
+from folium.plugins import Fullscreen, MiniMap
+
+from map_layers import (
+    BVALUE_OPACITY, DENSITY_OPACITY, EventLayer, EventTileLayer, PlaybackLayer, add_overlay,
+    add_overlay_tiles, bvalue_image, density_image
+)
+from regions import DEFAULT_REGION, REGIONS
+from tiles import MAX_ZOOM, playback_url, tile_url
+
+# Base map yang tersedia di semua peta
+BASE_TILES = {
+    'Satelit (Esri World Imagery)': 'https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
+    'Topografi (Esri World Topo)': 'https://server.arcgisonline.com/ArcGIS/rest/services/World_Topo_Map/MapServer/tile/{z}/{y}/{x}'
+}
+
+# Jumlah layer kejadian (per kombinasi filter) yang disimpan per sesi
+EVENT_LAYER_CACHE_SIZE = 16
+
+
+def overlay_kind(mode):
+    # Peta dasar hanya berbeda antara mode tile vektor dan mode lainnya
+    return 'tiles' if mode == 'Vector tile' else 'geojson'
+
+
+def create_base_map(region_key=DEFAULT_REGION, mode='Marker', on_error=None):
+    # Bagian statis peta: base map, overlay patahan/megathrust dan kontrol.
+    # Layer kejadian dan LayerControl ditambahkan terpisah (create_event_layer).
+    region = REGIONS[region_key]
+    m = folium.Map(
+        location=region['center'],
+        zoom_start=region['zoom'])
+
+    # Tambahkan beberapa base map
+    for name, url in BASE_TILES.items():
+        folium.TileLayer(url, attr=name, name=name).add_to(m)
+
+    # Tambahkan layer megathrust dan patahan (di-cache per proses)
+    for key in region['overlays']:
+        try:
+            if overlay_kind(mode) == 'tiles':
+                add_overlay_tiles(m, key, tile_url(region_key, key), max_native_zoom=MAX_ZOOM)
+            else:
+                add_overlay(m, key)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(f"Tidak dapat memuat data {key}: {e}")
+
+    # Add fullscreen control
+    Fullscreen().add_to(m)
+
+    # Add minimap
+    MiniMap().add_to(m)
+    return m
+
+
+def create_event_layer(data, mode='Marker', filters=None, region_key=DEFAULT_REGION,
+                       mag_min=None, mag_max=None, cluster_data=None):
+    # Layer kejadian dibungkus feature group supaya bisa diganti tanpa membangun ulang peta.
+    # cluster_data: kejadian untuk agregat cluster jika `data` hanya bagian viewport.
+    group = folium.FeatureGroup(name='Kejadian Gempa')
+
+    # Mode vector tile: browser hanya memuat tile sesuai viewport dan zoom
+    if mode == 'Vector tile':
+        EventTileLayer(tile_url(region_key, 'events', filters), max_native_zoom=MAX_ZOOM).add_to(group)
+        return group
+
+    # Semua kejadian dalam satu layer, warna dan ukuran dihitung sekaligus.
+    # Mode cluster menampilkan agregat grid sampai peta di-zoom dekat.
+    EventLayer(
+        data,
+        mag_min=data['mag'].min() if mag_min is None else mag_min,
+        mag_max=data['mag'].max() if mag_max is None else mag_max,
+        cluster=(mode == 'Cluster'),
+        cluster_data=cluster_data
+    ).add_to(group)
+    return group
+
+
+def create_playback_layer(key, playback):
+    # Playback yang sudah didaftarkan (playback.register_playback); frame diambil
+    # browser dari server tile lokal
+    group = folium.FeatureGroup(name='Kejadian Gempa')
+    PlaybackLayer(playback, playback_url(key)).add_to(group)
+    return group
+
+
+def create_bvalue_layer(grid):
+    # Grid b-value (bvalue.b_value_grid) sebagai gambar di atas peta, satu piksel per sel
+    step = grid['step']
+    group = folium.FeatureGroup(name='b-value Gutenberg-Richter')
+    folium.raster_layers.ImageOverlay(
+        bvalue_image(grid['b']),
+        bounds=[
+            [grid['lat'][0] - step / 2, grid['lon'][0] - step / 2],
+            [grid['lat'][-1] + step / 2, grid['lon'][-1] + step / 2],
+        ],
+        opacity=BVALUE_OPACITY,
+    ).add_to(group)
+    return group
+
+
+def create_density_layer(grid):
+    # Grid kepadatan (density.density_grid) sebagai satu gambar, bukan satu elemen per kejadian
+    step = grid['step']
+    group = folium.FeatureGroup(name='Kepadatan Gempa')
+    folium.raster_layers.ImageOverlay(
+        density_image(grid['density']),
+        bounds=[
+            [grid['lat'][0] - step / 2, grid['lon'][0] - step / 2],
+            [grid['lat'][-1] + step / 2, grid['lon'][-1] + step / 2],
+        ],
+        opacity=DENSITY_OPACITY,
+    ).add_to(group)
+    return group
+
+
+def create_map(data, mode='Marker', filters=None, region_key=DEFAULT_REGION,
+               mag_min=None, mag_max=None, on_error=None):
+    # Peta lengkap dalam satu objek, dipakai render batch (batch_render.py) dan benchmark.
+    # mag_min/mag_max = rentang magnitudo seluruh katalog untuk skala ukuran marker.
+    # on_error dipanggil dengan pesan jika overlay gagal dimuat (misal st.warning).
+    m = create_base_map(region_key, mode, on_error)
+    create_event_layer(data, mode, filters, region_key, mag_min, mag_max).add_to(m)
+    folium.LayerControl().add_to(m)
+    return m
+
+
+def viewport_from_state(state):
+    # Nilai kembalian st_folium -> ((lon_min, lat_min, lon_max, lat_max), zoom).
+    # (None, None) sebelum peta pernah digeser/di-zoom.
+    bounds = (state or {}).get('bounds') or {}
+    sw, ne = bounds.get('_southWest') or {}, bounds.get('_northEast') or {}
+    values = [sw.get('lng'), sw.get('lat'), ne.get('lng'), ne.get('lat')]
+    if None in values or state.get('zoom') is None:
+        return None, None
+    return tuple(float(v) for v in values), int(state['zoom'])
+
+
+def filter_hash(version, region_key, mode, filters):
+    # Kunci cache layer kejadian: versi katalog + wilayah + mode + semua nilai filter
+    state = {'version': version, 'region': region_key, 'mode': mode, 'filters': filters}
+    return hashlib.sha1(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class BaseMap:
+    # Peta dasar yang dipakai ulang antar rerun dalam satu sesi. Root peta dirender
+    # sekali di sini; st_folium dipanggil dengan render=False. st_folium juga menambahkan
+    # feature group, layer control dan script ke peta setiap dipanggil, jadi reset()
+    # mengembalikan peta ke kondisi awal sebelum dipakai lagi.
+
+    def __init__(self, m, errors=()):
+        self.map = m
+        # Pesan overlay yang gagal dimuat, ditampilkan ulang setiap rerun
+        self.errors = list(errors)
+        # st_folium mengganti id elemen peta saat pertama kali dipakai; lakukan sekali di sini
+        # sebelum render supaya kode peta (dan hash komponennya) sama di setiap rerun.
+        # Diimpor di sini supaya render batch tidak ikut memuat Streamlit.
+        from streamlit_folium import generate_leaflet_string
+        generate_leaflet_string(m)
+        m.get_root().render()
+        self._children = set(m._children)
+        self._script = set(m.get_root().script._children)
+
+    def reset(self):
+        for children, keep in [
+            (self.map._children, self._children),
+            (self.map.get_root().script._children, self._script),
+        ]:
+            for name in [name for name in children if name not in keep]:
+                del children[name]
+        return self.map
+
+
+class EventLayerCache:
+    # LRU layer kejadian per hash filter; kombinasi filter yang sama tidak dienkode ulang
+
+    def __init__(self, maxsize=EVENT_LAYER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        if key in self.items:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key]
+        self.misses += 1
+        layer = self.items[key] = build()
+        if len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+        return layer
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from cache import CACHE_DIR, atomic_path
+
+# Waktu per tahap setiap rerun Streamlit (load, filter, create_map, st_folium, tabel).
+#   reruns.jsonl       : satu baris JSON per rerun, dirotasi per LOG_MAX_BYTES
+#   gempa_dashboard.prom: format teks Prometheus untuk textfile collector node exporter
+#                         (arahkan --collector.textfile.directory ke METRICS_DIR)
+METRICS_DIR = os.path.join(CACHE_DIR, 'metrics')
+METRICS_LOG = os.path.join(METRICS_DIR, 'reruns.jsonl')
+PROM_PATH = os.path.join(METRICS_DIR, 'gempa_dashboard.prom')
+LOG_MAX_BYTES = 5 * 2 ** 20
+LOG_BACKUPS = 3
+# Jumlah rerun terakhir yang ditampilkan di panel debug
+HISTORY_SIZE = 50
+
+# Total per tahap (Prometheus) dipakai bersama semua sesi dalam satu proses Streamlit;
+# riwayat untuk panel debug disimpan per sesi (lihat new_history)
+_totals = {}
+_reruns = {'count': 0, 'seconds': 0.0}
+_lock = threading.Lock()
+_logger = None
+
+
+def _rerun_logger():
+    global _logger
+    if _logger is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        handler = RotatingFileHandler(METRICS_LOG, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _logger = logging.getLogger('gempa.metrics')
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        _logger.addHandler(handler)
+    return _logger
+
+
+def new_history(maxlen=HISTORY_SIZE):
+    # Riwayat rerun satu sesi (simpan di st.session_state)
+    return deque(maxlen=maxlen)
+
+
+class RerunMetrics:
+    # Kumpulan tahap satu rerun; label (misal wilayah, mode peta) ikut tercatat.
+    # history: riwayat sesi (new_history) yang ditambah saat finish(), boleh None
+
+    def __init__(self, history=None, **labels):
+        self.history = history
+        self.labels = labels
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows=None, payload_bytes=None):
+        # rows/bytes bisa diisi belakangan lewat dict yang di-yield
+        record = {'stage': name, 'rows': rows, 'bytes': payload_bytes}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self.stages.append(record)
+
+    def finish(self):
+        record = {
+            'time': self.started,
+            'seconds': time.perf_counter() - self.start,
+            **self.labels,
+            'stages': self.stages,
+        }
+        if self.history is not None:
+            self.history.append(record)
+        with _lock:
+            _reruns['count'] += 1
+            _reruns['seconds'] += record['seconds']
+            for s in self.stages:
+                total = _totals.setdefault(s['stage'], {'count': 0, 'seconds': 0.0})
+                total['count'] += 1
+                total['seconds'] += s['seconds']
+                total['last'] = s
+            try:
+                _rerun_logger().info(json.dumps(record))
+                write_prometheus()
+            except OSError:
+                # Folder cache tidak bisa ditulis, metrik tetap ada di memori
+                pass
+        return record
+
+
+def write_prometheus(path=PROM_PATH):
+    lines = [
+        '# HELP gempa_reruns_total Jumlah rerun dashboard',
+        '# TYPE gempa_reruns_total counter',
+        f"gempa_reruns_total {_reruns['count']}",
+        '# HELP gempa_rerun_seconds Durasi total rerun dashboard',
+        '# TYPE gempa_rerun_seconds summary',
+        f"gempa_rerun_seconds_sum {_reruns['seconds']:.6f}",
+        f"gempa_rerun_seconds_count {_reruns['count']}",
+        '# HELP gempa_stage_seconds Durasi tahap rerun dashboard',
+        '# TYPE gempa_stage_seconds summary',
+    ]
+    for stage, total in sorted(_totals.items()):
+        lines.append(f'gempa_stage_seconds_sum{{stage="{stage}"}} {total["seconds"]:.6f}')
+        lines.append(f'gempa_stage_seconds_count{{stage="{stage}"}} {total["count"]}')
+
+    gauges = [
+        ('seconds', 'gempa_stage_last_seconds', 'Durasi tahap pada rerun terakhir'),
+        ('rows', 'gempa_stage_last_rows', 'Jumlah baris tahap pada rerun terakhir'),
+        ('bytes', 'gempa_stage_last_bytes', 'Ukuran payload tahap pada rerun terakhir'),
+    ]
+    for field, metric, help_text in gauges:
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} gauge']
+        for stage, total in sorted(_totals.items()):
+            value = total['last'][field]
+            if value is not None:
+                lines.append(f'{metric}{{stage="{stage}"}} {value}')
+
+    # Tulis atomik supaya collector tidak membaca file setengah jadi
+    with atomic_path(path) as tmp, open(tmp, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def recent_reruns(history, n=HISTORY_SIZE):
+    # Baris datar (satu per tahap) riwayat satu sesi untuk ditampilkan sebagai tabel, terbaru dulu
+    history = list(history)[-n:]
+    rows = []
+    for i, record in enumerate(reversed(history)):
+        labels = {k: v for k, v in record.items() if k not in ('time', 'seconds', 'stages')}
+        for s in record['stages']:
+            rows.append({
+                'rerun': i,
+                'waktu': time.strftime('%H:%M:%S', time.localtime(record['time'])),
+                **labels,
+                'tahap': s['stage'],
+                'detik': round(s['seconds'], 4),
+                'baris': s['rows'],
+                'bytes': s['bytes'],
+            })
+    return rows
+
+
+def map_payload_bytes(element):
+    # Ukuran data kejadian yang dikirim ke browser (lihat EventLayer.payload_bytes),
+    # dicari di seluruh turunan peta/feature group
+    def walk(el):
+        yield getattr(el, 'payload_bytes', 0)
+        for child in el._children.values():
+            yield from walk(child)
+    return sum(walk(element)) or None
@@ -0,0 +1,39 @@
+from functools import lru_cache
+
+import geopandas as gpd
+
+# Konfigurasi layer patahan/megathrust (data saja, tanpa pustaka peta): dipakai
+# map_layers untuk menggambar, faults untuk jarak kejadian, tiles untuk tile vektor
+OVERLAYS = {
+    'megathrust': {
+        'path': './data/megathrust/megathrust.shp',
+        'name': 'Zona Megathrust',
+        'fields': ['Name'],
+        'aliases': ['Nama Zona: '],
+        'style': {
+            'color': 'red',
+            'weight': 3,
+            'fillOpacity': 0.1
+        },
+    },
+    'patahan': {
+        'path': './data/patahan/patahan.shp',
+        'name': 'Zona Patahan',
+        'fields': ['Name'],
+        'aliases': ['Nama Patahan: '],
+        'style': {
+            'color': 'blue',
+            'weight': 2,
+            'dashArray': '5, 5',
+            'fillOpacity': 0.1
+        },
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def load_overlay_frame(key):
+    # Shapefile dibaca sekali per proses, hanya kolom yang dipakai tooltip
+    overlay = OVERLAYS[key]
+    layer = gpd.read_file(overlay['path'], columns=overlay['fields'])
+    return layer[overlay['fields'] + ['geometry']]
@@ -0,0 +1,124 @@
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from map_layers import (
+    COORD_SCALE, MAG_SCALE, MAX_RADIUS, depth_color_index, marker_radius, wire_column, wire_int16
+)
+
+# Putar ulang katalog per waktu. Kejadian hasil filter diurutkan sekali menurut waktu;
+# frame = kejadian dalam satu hari/bulan/tahun (WIB) = potongan [bounds[i], bounds[i+1])
+# dari array terurut. Browser hanya menerima jumlah kejadian per frame di awal, isi
+# frame diambil dari server tile lokal saat diputar (lihat tiles.py, PlaybackLayer).
+PLAYBACK_UNITS = {
+    'D': 'Hari',
+    'M': 'Bulan',
+    'Y': 'Tahun',
+}
+DEFAULT_UNIT = 'M'
+UTC_OFFSET_MS = 7 * 3600 * 1000
+# Playback yang disimpan di proses (dipakai bersama semua sesi, per hash filter)
+PLAYBACK_CACHE_SIZE = 8
+# Jeda antar frame, jumlah frame sebelumnya yang masih tampil (memudar) dan
+# jumlah frame berikutnya yang diambil lebih dulu
+FRAME_INTERVAL_MS = 700
+TRAIL_FRAMES = 3
+PREFETCH_FRAMES = 5
+
+
+class Playback:
+
+    def __init__(self, gdf, rows, unit=DEFAULT_UNIT, mag_min=None, mag_max=None):
+        t = gdf['epoch_ms'].to_numpy()[rows]
+        order = np.argsort(t, kind='stable')
+        rows = np.asarray(rows)[order]
+        mag = gdf['mag'].to_numpy(dtype=float)[rows]
+        depth = gdf['depth'].to_numpy(dtype=float)[rows]
+        mag_min = np.nanmin(mag) if mag_min is None else mag_min
+        mag_max = np.nanmax(mag) if mag_max is None else mag_max
+
+        # Kolom terurut waktu, sudah dalam bentuk yang dikirim (lihat encode_events)
+        self.unit = unit
+        self.t = t[order]
+        self.lon = np.round(gdf['longitude'].to_numpy(dtype=float)[rows] * COORD_SCALE)
+        self.lat = np.round(gdf['latitude'].to_numpy(dtype=float)[rows] * COORD_SCALE)
+        self.mag = wire_int16(mag, MAG_SCALE)
+        self.depth = wire_int16(np.trunc(depth))
+        self.color = depth_color_index(depth)
+        self.radius = np.clip(marker_radius(np.nan_to_num(mag, nan=mag_min), mag_min, mag_max), 0, MAX_RADIUS)
+
+        # Batas frame: awal hari/bulan/tahun WIB, dari kejadian pertama sampai terakhir
+        if len(self.t):
+            local = (self.t[[0, -1]] + UTC_OFFSET_MS).astype('datetime64[ms]').astype(f'datetime64[{unit}]')
+            edges = np.arange(local[0], local[1] + 2).astype('datetime64[ms]').astype(np.int64)
+            self.edges = edges - UTC_OFFSET_MS
+        else:
+            self.edges = np.array([0], dtype=np.int64)
+        self.bounds = np.searchsorted(self.t, self.edges, side='left')
+
+    def __len__(self):
+        return len(self.edges) - 1
+
+    @property
+    def counts(self):
+        return np.diff(self.bounds)
+
+    def frame(self, i):
+        a, b = self.bounds[i], self.bounds[i + 1]
+        return {
+            'n': int(b - a),
+            'start': int(self.edges[i]),
+            'lon': wire_column(self.lon[a:b], 'i4'),
+            'lat': wire_column(self.lat[a:b], 'i4'),
+            'mag': wire_column(self.mag[a:b], 'i2'),
+            'depth': wire_column(self.depth[a:b], 'i2'),
+            # Detik sejak awal frame
+            't': wire_column((self.t[a:b] - self.edges[i]) // 1000, 'u4'),
+            'color': wire_column(self.color[a:b], 'u1'),
+            'radius': wire_column(self.radius[a:b], 'u1'),
+        }
+
+    def config(self):
+        # Data awal untuk browser: jumlah kejadian per frame, tanpa isi frame
+        counts = self.counts
+        top = counts.max() if len(counts) else 0
+        dtype = 'u1' if top < 2 ** 8 else 'u2' if top < 2 ** 16 else 'u4'
+        return {
+            'frames': len(self),
+            'start': int(self.edges[0]),
+            'unit': self.unit,
+            'offset': UTC_OFFSET_MS,
+            'counts': wire_column(counts, dtype),
+            'interval': FRAME_INTERVAL_MS,
+            'trail': TRAIL_FRAMES,
+            'prefetch': PREFETCH_FRAMES,
+        }
+
+
+_playbacks = OrderedDict()
+_lock = threading.Lock()
+
+
+def register_playback(key, build, maxsize=PLAYBACK_CACHE_SIZE):
+    # Playback per hash filter; build() hanya dipanggil jika belum ada
+    with _lock:
+        if key in _playbacks:
+            _playbacks.move_to_end(key)
+            return _playbacks[key]
+    playback = build()
+    with _lock:
+        _playbacks[key] = playback
+        while len(_playbacks) > maxsize:
+            _playbacks.popitem(last=False)
+    return playback
+
+
+def playback_frame(key, i):
+    # Isi frame (JSON) untuk server tile; None jika playback atau frame tidak ada
+    with _lock:
+        playback = _playbacks.get(key)
+    if playback is None or not 0 <= i < len(playback):
+        return None
+    return json.dumps(playback.frame(i)).encode()
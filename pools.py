@@ -0,0 +1,8 @@
+import multiprocessing
+
+
+def pool_context():
+    # Streamlit menjalankan skrip di thread; fork dari proses multi-thread bisa deadlock,
+    # jadi worker dibuat lewat forkserver (atau spawn) dan hanya mengimpor modul fungsi worker
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
@@ -0,0 +1,74 @@
+import os
+
+from cache import CACHE_DIR
+
+# Daftar wilayah yang bisa dipilih di dashboard. Katalog tiap wilayah baru dimuat
+# saat wilayah itu dipilih, dan punya cache data/agregat sendiri.
+#   catalog  : katalog statis (dipakai sampai store hasil sync FDSN tersedia)
+#   store    : folder store untuk sync/upsert (lihat store.py)
+#   bounds   : (lon_min, lat_min, lon_max, lat_max), juga dipakai sebagai batas query FDSN
+REGIONS = {
+    'jawa_sumatera': {
+        'name': 'Jawa dan Sumatera',
+        'catalog': './data/indo.geojson',
+        'store': os.path.join(CACHE_DIR, 'store', 'indo'),
+        'bounds': (94, -11, 115, 7),
+        'center': [-2.54, 110.7126],
+        'zoom': 6,
+        'overlays': ['megathrust', 'patahan'],
+    },
+    'jawa': {
+        'name': 'Jawa',
+        'catalog': './data/gempa.geojson',
+        'store': os.path.join(CACHE_DIR, 'store', 'jawa'),
+        'bounds': (105, -9.5, 115, -5),
+        'center': [-7.3, 110.0],
+        'zoom': 7,
+        'overlays': ['megathrust', 'patahan'],
+    },
+    'jawa_barat': {
+        'name': 'Jawa Barat',
+        'catalog': './data/gempa.csv',
+        'store': os.path.join(CACHE_DIR, 'store', 'jawa_barat'),
+        'bounds': (105.5, -8.5, 109, -5.5),
+        'center': [-6.9, 107.6],
+        'zoom': 8,
+        'overlays': ['megathrust', 'patahan'],
+    },
+    'nusa_tenggara': {
+        'name': 'Nusa Tenggara',
+        'catalog': './data/gempanusa.geojson',
+        'store': os.path.join(CACHE_DIR, 'store', 'nusa_tenggara'),
+        'bounds': (115.5, -12, 129, -6),
+        'center': [-9.0, 122.0],
+        'zoom': 6,
+        'overlays': ['megathrust', 'patahan'],
+    },
+    # Semua katalog di data/ tanpa duplikat id, dibuat dengan `python store.py merge`;
+    # sebelum store gabungan ada, wilayah ini menampilkan katalog statis terbesar
+    'gabungan': {
+        'name': 'Semua katalog (gabungan)',
+        'catalog': './data/indo.geojson',
+        'store': os.path.join(CACHE_DIR, 'store', 'merged'),
+        'bounds': (94, -12, 129, 7),
+        'center': [-4.5, 111.5],
+        'zoom': 5,
+        'overlays': ['megathrust', 'patahan'],
+    },
+}
+
+DEFAULT_REGION = 'jawa_sumatera'
+
+# Jumlah katalog wilayah yang boleh tinggal di memori sekaligus
+MAX_RESIDENT_REGIONS = 2
+
+
+def fetch_params(key, minmagnitude=3):
+    lon_min, lat_min, lon_max, lat_max = REGIONS[key]['bounds']
+    return {
+        'minlatitude': lat_min,
+        'maxlatitude': lat_max,
+        'minlongitude': lon_min,
+        'maxlongitude': lon_max,
+        'minmagnitude': minmagnitude,
+    }
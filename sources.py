@@ -0,0 +1,97 @@
+import geopandas as gpd
+import pandas as pd
+import pyogrio
+
+# Membaca katalog mentah (GeoJSON / CSV ekspor USGS) menjadi GeoDataFrame bertipe.
+# Kolom turunan yang butuh data lain (jarak patahan, wilayah) ditambahkan terpisah
+# oleh derived.add_derived_columns saat ingest / upsert store.
+
+# Katalog gempa yang tersedia di folder data
+CATALOG_SOURCES = {
+    'indo': './data/indo.geojson',
+    'gempa': './data/gempa.geojson',
+    'gempanusa': './data/gempanusa.geojson',
+    'gempa_csv': './data/gempa.csv',
+}
+
+# Kolom lokasi hasil pemecahan `place` (lihat add_place_columns)
+PLACE_COLUMNS = ['place_prefix', 'place_locality']
+
+# Kolom USGS yang di GeoJSON tersimpan sebagai teks
+NUMERIC_COLUMNS = [
+    'latitude', 'longitude', 'depth', 'mag', 'nst', 'gap', 'dmin', 'rms',
+    'horizontalError', 'depthError', 'magError', 'magNst',
+]
+TIME_COLUMNS = ['time', 'updated']
+
+# Format waktu hanya dipakai saat ditampilkan
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def normalize_catalog(gdf):
+    # Ubah kolom teks menjadi tipe data yang sebenarnya
+    for col in NUMERIC_COLUMNS:
+        if col in gdf.columns:
+            gdf[col] = pd.to_numeric(gdf[col], errors='coerce').astype('float64')
+    for col in TIME_COLUMNS:
+        if col in gdf.columns:
+            gdf[col] = pd.to_datetime(gdf[col], utc=True, format='ISO8601').astype('datetime64[ns, UTC]')
+    return add_place_columns(add_time_columns(gdf))
+
+
+def add_time_columns(gdf):
+    # Kolom waktu turunan, semuanya tetap bertipe datetime/integer
+    gdf['time_wib'] = gdf['time'].dt.tz_convert('Asia/Jakarta')
+    gdf['epoch_ms'] = gdf['time'].astype('int64') // 1_000_000
+    gdf['year'] = gdf['time_wib'].dt.year.astype('int16')
+    gdf['month'] = gdf['time_wib'].dt.month.astype('int8')
+    return gdf
+
+
+def add_place_columns(gdf):
+    # "20 km W of Sidareja, Indonesia" -> kategori "20 km W" + "Sidareja, Indonesia",
+    # dipecah sekali di sini supaya layer peta cukup mengirim kode integernya
+    parts = gdf['place'].fillna('').astype(str).str.partition(' of ').reindex(columns=range(3), fill_value='')
+    has_prefix = parts[1] != ''
+    gdf['place_prefix'] = parts[0].where(has_prefix, '').astype('category')
+    gdf['place_locality'] = parts[2].where(has_prefix, parts[0]).astype('category')
+    return gdf
+
+
+def format_time(series):
+    return series.dt.strftime(TIME_FORMAT)
+
+
+def read_source(path):
+    # Baca katalog mentah (GeoJSON atau CSV ekspor USGS)
+    if path.endswith('.csv'):
+        df = pd.read_csv(path)
+        gdf = gpd.GeoDataFrame(
+            df,
+            geometry=gpd.points_from_xy(df['longitude'], df['latitude']),
+            crs='EPSG:4326'
+        )
+    else:
+        gdf = gpd.read_file(path)
+    return normalize_catalog(gdf)
+
+
+def iter_source_chunks(path, chunksize=50000):
+    # Baca katalog sumber per potongan supaya memori tetap terbatas
+    if path.endswith('.csv'):
+        for df in pd.read_csv(path, chunksize=chunksize):
+            gdf = gpd.GeoDataFrame(
+                df,
+                geometry=gpd.points_from_xy(df['longitude'], df['latitude']),
+                crs='EPSG:4326'
+            )
+            yield normalize_catalog(gdf)
+        return
+
+    with pyogrio.open_arrow(path, batch_size=chunksize, use_pyarrow=True) as (meta, reader):
+        geom_col = meta['geometry_name'] or 'wkb_geometry'
+        for batch in reader:
+            df = batch.to_pandas()
+            geometry = gpd.GeoSeries.from_wkb(df.pop(geom_col), crs=meta['crs'])
+            df = df.drop(columns=[meta['fid_column']], errors='ignore')
+            yield normalize_catalog(gpd.GeoDataFrame(df, geometry=geometry))
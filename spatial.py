@@ -0,0 +1,54 @@
+import numpy as np
+import shapely
+
+# Di atas fraksi luas ini, mask vektor lebih cepat daripada menelusuri pohon
+DENSE_QUERY_FRACTION = 0.25
+
+
+class EventIndex:
+    # Indeks spasial (STRtree) atas koordinat kejadian, dibangun sekali saat data dimuat.
+    # Hasil query berupa posisi baris (iloc) yang terurut, jadi urutan katalog tetap.
+
+    def __init__(self, lon, lat):
+        self.lon = np.asarray(lon, dtype=float)
+        self.lat = np.asarray(lat, dtype=float)
+        self.tree = shapely.STRtree(shapely.points(self.lon, self.lat))
+        self.bounds = (
+            np.nanmin(self.lon), np.nanmin(self.lat), np.nanmax(self.lon), np.nanmax(self.lat)
+        ) if len(self.lon) else (0.0, 0.0, 0.0, 0.0)
+        self.valid = np.flatnonzero(~(np.isnan(self.lon) | np.isnan(self.lat)))
+
+    @classmethod
+    def from_frame(cls, gdf):
+        return cls(gdf['longitude'].to_numpy(), gdf['latitude'].to_numpy())
+
+    def __len__(self):
+        return len(self.lon)
+
+    def box_fraction(self, lon_min, lat_min, lon_max, lat_max):
+        # Perkiraan kasar fraksi katalog di dalam kotak (berdasarkan luas)
+        b_lon_min, b_lat_min, b_lon_max, b_lat_max = self.bounds
+        area = (b_lon_max - b_lon_min) * (b_lat_max - b_lat_min)
+        if area <= 0:
+            return 1.0
+        overlap = (
+            max(0.0, min(lon_max, b_lon_max) - max(lon_min, b_lon_min))
+            * max(0.0, min(lat_max, b_lat_max) - max(lat_min, b_lat_min))
+        )
+        return overlap / area
+
+    def query_bbox(self, lon_min, lat_min, lon_max, lat_max):
+        # Batas inklusif, sama dengan filter >= dan <= pada kolom latitude/longitude
+        b_lon_min, b_lat_min, b_lon_max, b_lat_max = self.bounds
+        if lon_min <= b_lon_min and lat_min <= b_lat_min and lon_max >= b_lon_max and lat_max >= b_lat_max:
+            return self.valid
+
+        if self.box_fraction(lon_min, lat_min, lon_max, lat_max) > DENSE_QUERY_FRACTION:
+            return np.flatnonzero(
+                (self.lon >= lon_min) & (self.lon <= lon_max)
+                & (self.lat >= lat_min) & (self.lat <= lat_max)
+            )
+
+        idx = self.tree.query(shapely.box(lon_min, lat_min, lon_max, lat_max))
+        idx.sort()
+        return idx
@@ -0,0 +1,264 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import urllib.parse
+import urllib.request
+
+import geopandas as gpd
+import pandas as pd
+
+from aggregates import aggregates_path, update_table
+from cache import write_json, write_parquet
+from derived import add_derived_columns, ensure_derived_columns
+from regions import DEFAULT_REGION, REGIONS, fetch_params
+from sources import CATALOG_SOURCES, iter_source_chunks, normalize_catalog, read_source
+
+# Store lokal: katalog dipartisi per tahun (Parquet), di-upsert berdasarkan id USGS
+STORE_DIR = REGIONS[DEFAULT_REGION]['store']
+SEED_CATALOG = REGIONS[DEFAULT_REGION]['catalog']
+# Gabungan semua katalog di data/ tanpa duplikat, ditampilkan sebagai wilayah 'gabungan'
+MERGED_STORE_DIR = REGIONS['gabungan']['store']
+MERGE_CHUNKSIZE = 50000
+
+# Endpoint FDSN bisa diganti (misal server tiruan lokal untuk pengujian)
+FDSN_ENDPOINT = 'https://earthquake.usgs.gov/fdsnws/event/1/query'
+FETCH_PARAMS = fetch_params(DEFAULT_REGION)
+PAGE_SIZE = 20000
+
+
+def active_catalog(store_dir=STORE_DIR, seed_catalog=SEED_CATALOG):
+    # Pakai store jika sudah pernah diisi, selain itu katalog statis
+    return store_dir if store_exists(store_dir) else seed_catalog
+
+
+def region_catalog(key):
+    return active_catalog(REGIONS[key]['store'], REGIONS[key]['catalog'])
+
+
+def state_path(store_dir):
+    return os.path.join(store_dir, 'state.json')
+
+
+def ids_path(store_dir):
+    return os.path.join(store_dir, 'ids.parquet')
+
+
+def partition_path(store_dir, year):
+    return os.path.join(store_dir, f'year={int(year)}.parquet')
+
+
+def store_exists(store_dir=STORE_DIR):
+    return os.path.exists(state_path(store_dir))
+
+
+def read_state(store_dir):
+    if not store_exists(store_dir):
+        return {'latest_updated': None, 'partitions': {}, 'version': None}
+    with open(state_path(store_dir)) as f:
+        return json.load(f)
+
+
+def read_partition(store_dir, year):
+    # Partisi lama (sebelum ada kolom lokasi / jarak patahan / layer poligon) dilengkapi saat dibaca
+    path = partition_path(store_dir, year)
+    if not os.path.exists(path):
+        return None
+    return ensure_derived_columns(gpd.read_parquet(path))
+
+
+def load_store(store_dir=STORE_DIR):
+    # Gabungkan semua partisi, urut waktu terbaru dulu seperti ekspor USGS
+    state = read_state(store_dir)
+    parts = [read_partition(store_dir, year) for year in sorted(state['partitions'], reverse=True)]
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return None
+    gdf = ensure_derived_columns(pd.concat(parts, ignore_index=True))
+    return gdf.sort_values('time', ascending=False, kind='stable', ignore_index=True)
+
+
+def upsert(store_dir, events):
+    # Sisipkan/perbarui kejadian berdasarkan id; versi dengan `updated` terbaru yang menang.
+    # Hanya partisi tahun yang tersentuh yang ditulis ulang. Mengembalikan tahun yang berubah.
+    os.makedirs(store_dir, exist_ok=True)
+    events = events.sort_values('updated', kind='stable').drop_duplicates('id', keep='last')
+
+    if os.path.exists(ids_path(store_dir)):
+        index = pd.read_parquet(ids_path(store_dir))
+    else:
+        index = pd.DataFrame({
+            'id': pd.Series(dtype='str'),
+            'year': pd.Series(dtype='int16'),
+            'updated': pd.Series(dtype='datetime64[ns, UTC]'),
+        })
+
+    current = index.set_index('id').reindex(events['id'])
+    newer = (current['updated'].isna() | (events['updated'].to_numpy() >= current['updated'].to_numpy())).to_numpy()
+    events = events[newer]
+    if events.empty:
+        return []
+    # Kolom turunan hanya dihitung untuk kejadian yang benar-benar masuk store
+    events = add_derived_columns(events.copy())
+
+    # Tahun lama ikut terdampak jika waktu kejadian bergeser ke tahun lain
+    old_years = current['year'][newer].dropna().astype(int)
+    affected = sorted(set(events['year'].astype(int)) | set(old_years))
+    state = read_state(store_dir)
+    changed_ids = set(events['id'])
+    # Agregat diperbarui per tahun di dalam loop, jadi setiap partisi dilepas setelah ditulis.
+    # Store lama yang belum punya agregat dihitung ulang setelah loop.
+    agg_path = aggregates_path(store_dir)
+    if os.path.exists(agg_path):
+        table = pd.read_parquet(agg_path)
+    else:
+        table = update_table(None, {}) if not state['partitions'] else None
+
+    for year in affected:
+        part = read_partition(store_dir, year)
+        incoming = events[events['year'] == year]
+        if part is not None:
+            part = part[~part['id'].isin(changed_ids)]
+            part = pd.concat([part, incoming], ignore_index=True) if len(incoming) else part
+        else:
+            part = incoming
+        part = part.sort_values('time', ascending=False, kind='stable', ignore_index=True)
+
+        if len(part):
+            write_parquet(gpd.GeoDataFrame(part, geometry='geometry', crs='EPSG:4326'),
+                          partition_path(store_dir, year))
+            state['partitions'][str(year)] = {'rows': len(part), 'updated': part['updated'].max().isoformat()}
+        else:
+            os.remove(partition_path(store_dir, year))
+            state['partitions'].pop(str(year), None)
+        if table is not None:
+            table = update_table(table, {year: part})
+        del part
+
+    index = pd.concat([
+        index[~index['id'].isin(changed_ids)],
+        events[['id', 'year', 'updated']],
+    ], ignore_index=True)
+    write_parquet(index, ids_path(store_dir))
+
+    if table is None:
+        # Dari semua partisi, satu partisi di memori pada satu waktu
+        table = update_table(None, {})
+        for year in state['partitions']:
+            table = update_table(table, {int(year): read_partition(store_dir, year)})
+    write_parquet(table, agg_path)
+
+    state['latest_updated'] = index['updated'].max().isoformat()
+    state['version'] = hashlib.sha256(
+        json.dumps(state['partitions'], sort_keys=True).encode()
+    ).hexdigest()
+    write_json(state_path(store_dir), state)
+    return affected
+
+
+def fetch_events(endpoint=FDSN_ENDPOINT, updated_after=None, params=None):
+    # Ambil kejadian dari endpoint FDSN (format CSV = skema yang sama dengan data/*.csv)
+    query = {'format': 'csv', 'orderby': 'time-asc', 'limit': PAGE_SIZE}
+    query.update(FETCH_PARAMS if params is None else params)
+    if updated_after is not None:
+        query['updatedafter'] = pd.Timestamp(updated_after).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+
+    pages = []
+    offset = 1
+    while True:
+        query['offset'] = offset
+        url = f'{endpoint}?{urllib.parse.urlencode(query)}'
+        with urllib.request.urlopen(url, timeout=60) as resp:
+            # 204 = tidak ada kejadian baru
+            body = resp.read() if resp.status != 204 else b''
+        if not body.strip():
+            break
+        page = pd.read_csv(io.BytesIO(body))
+        pages.append(page)
+        if len(page) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+
+    if not pages:
+        return None
+    df = pd.concat(pages, ignore_index=True)
+    gdf = gpd.GeoDataFrame(
+        df,
+        geometry=gpd.points_from_xy(df['longitude'], df['latitude']),
+        crs='EPSG:4326'
+    )
+    return normalize_catalog(gdf)
+
+
+def seed(store_dir=STORE_DIR, source=SEED_CATALOG):
+    # Isi awal store dari katalog statis
+    return upsert(store_dir, read_source(source))
+
+
+def merge(sources, store_dir=MERGED_STORE_DIR, chunksize=MERGE_CHUNKSIZE):
+    # Alirkan setiap sumber per potongan ke store; duplikat id diselesaikan oleh upsert
+    # (versi `updated` terbaru menang). Paling banyak satu potongan dan satu partisi
+    # tahun yang ada di memori pada satu waktu.
+    stats = {}
+    for source in sources:
+        rows = 0
+        for chunk in iter_source_chunks(source, chunksize):
+            upsert(store_dir, chunk)
+            rows += len(chunk)
+        stats[source] = rows
+    return stats
+
+
+def sync(store_dir=STORE_DIR, endpoint=FDSN_ENDPOINT, params=None, seed_catalog=SEED_CATALOG):
+    # Ambil hanya kejadian yang diperbarui setelah `updated` terakhir di store
+    if not store_exists(store_dir):
+        seed(store_dir, seed_catalog)
+    state = read_state(store_dir)
+    events = fetch_events(endpoint, state['latest_updated'], params)
+    if events is None:
+        return 0, []
+    return len(events), upsert(store_dir, events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store katalog gempa lokal")
+    parser.add_argument('--region', default=DEFAULT_REGION, choices=list(REGIONS), help="Wilayah (lihat regions.py)")
+    parser.add_argument('--store', help="Folder store (default: store wilayah, atau store merged untuk merge)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_seed = sub.add_parser('seed', help="Isi ulang store dari katalog statis")
+    p_seed.add_argument('source', nargs='?', help="Katalog sumber (default: katalog wilayah)")
+
+    p_merge = sub.add_parser('merge', help="Gabungkan beberapa katalog tanpa duplikat id")
+    p_merge.add_argument('sources', nargs='*', help="Nama/path katalog (default: semua di data/)")
+    p_merge.add_argument('--chunksize', type=int, default=MERGE_CHUNKSIZE)
+
+    p_sync = sub.add_parser('sync', help="Ambil kejadian baru dari endpoint FDSN")
+    p_sync.add_argument('--endpoint', default=FDSN_ENDPOINT)
+
+    args = parser.parse_args()
+    region = REGIONS[args.region]
+    if args.store is None:
+        args.store = MERGED_STORE_DIR if args.command == 'merge' else region['store']
+
+    if args.command == 'seed':
+        shutil.rmtree(args.store, ignore_errors=True)
+        years = seed(args.store, args.source or region['catalog'])
+        print(f"Store dibuat di {args.store}: {len(years)} partisi tahun")
+    elif args.command == 'merge':
+        sources = [CATALOG_SOURCES.get(name, name) for name in args.sources] or list(CATALOG_SOURCES.values())
+        shutil.rmtree(args.store, ignore_errors=True)
+        stats = merge(sources, args.store, args.chunksize)
+        for source, rows in stats.items():
+            print(f"{source}: {rows} baris dibaca")
+        total = sum(p['rows'] for p in read_state(args.store)['partitions'].values())
+        print(f"Hasil: {total} kejadian unik di {args.store}")
+    elif args.command == 'sync':
+        n, years = sync(args.store, args.endpoint, fetch_params(args.region), region['catalog'])
+        print(f"{n} kejadian diambil, partisi diperbarui: {', '.join(map(str, years)) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from contextlib import suppress
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+import mapbox_vector_tile
+import numpy as np
+import shapely
+
+from cache import CACHE_DIR, atomic_path, file_hash
+from catalog import catalog_version, load_catalog
+from decluster import label_version, load_declustering
+from faults import FAULT_DISTANCE_COLUMNS, FAULT_LAYERS
+from map_layers import (
+    MAX_RADIUS, depth_colors, marker_radius
+)
+from overlays import OVERLAYS, load_overlay_frame
+from playback import playback_frame
+from spatial import EventIndex
+from regions import REGIONS
+from store import region_catalog
+
+# Server tile vektor (MVT) lokal untuk katalog gempa dan layer patahan.
+# Host/port server dan URL yang dipakai browser bisa diatur lewat environment, misal
+# GEMPA_TILE_URL=https://peta.example.org/tile jika server berada di balik reverse proxy.
+TILE_HOST = os.environ.get('GEMPA_TILE_HOST', 'localhost')
+TILE_PORT = int(os.environ.get('GEMPA_TILE_PORT', 8765))
+TILE_URL = os.environ.get('GEMPA_TILE_URL', f'http://{TILE_HOST}:{TILE_PORT}').rstrip('/')
+TILE_CACHE_DIR = os.path.join(CACHE_DIR, 'tiles')
+# Folder tile per kombinasi filter yang disimpan per versi katalog; slider menghasilkan
+# kombinasi baru terus-menerus, yang paling lama tidak dipakai dihapus
+MAX_CACHED_FILTERS = 64
+
+EXTENT = 4096
+# Buffer supaya marker/garis di tepi tile tidak terpotong (dalam satuan extent)
+BUFFER = int(MAX_RADIUS / 256 * EXTENT)
+MAX_ZOOM = 14
+# Batas detail per tile, diterapkan setelah filter; kejadian dengan magnitudo terbesar didahulukan
+MAX_TILE_FEATURES = 3000
+# Filter tile kejadian (parameter ?filters=<json>, sama dengan map_filters di dashboard):
+# [min, max] untuk rentang, nilai tunggal untuk kesamaan
+TILE_FILTERS = ['year', 'mag', 'depth', 'lat', 'lon', *FAULT_DISTANCE_COLUMNS.values(), 'mainshock']
+
+TILE_PATH = re.compile(
+    r'^/tiles/(?P<region>\w+)/(?P<layer>\w+)/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.pbf$'
+)
+# Frame playback (playback.py); hanya ada di proses yang mendaftarkan playback-nya
+PLAYBACK_PATH = re.compile(r'^/playback/(?P<key>\w+)/(?P<frame>\d+)\.json$')
+
+
+def tile_url(region, layer, filters=None):
+    url = f'{TILE_URL}/tiles/{region}/{layer}/{{z}}/{{x}}/{{y}}.pbf'
+    if filters:
+        url += '?filters=' + quote(json.dumps(filters, sort_keys=True, separators=(',', ':')), safe='')
+    return url
+
+
+def filter_key(filters):
+    # Nama folder cache tile per kombinasi filter
+    if not filters:
+        return 'all'
+    return hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def parse_filters(query):
+    # ?filters=<json> -> dict; ValueError jika formatnya salah atau kuncinya tidak dikenal
+    values = parse_qs(query).get('filters')
+    if not values:
+        return {}
+    filters = json.loads(values[0])
+    if not isinstance(filters, dict):
+        raise ValueError('filters harus objek JSON')
+    for key, value in filters.items():
+        if key not in TILE_FILTERS:
+            raise ValueError(f'filter tidak dikenal: {key}')
+        if isinstance(value, list):
+            if len(value) != 2 or not all(isinstance(v, (int, float)) for v in value):
+                raise ValueError(f'rentang filter {key} harus [min, max]')
+        elif not isinstance(value, (int, float)):
+            raise ValueError(f'nilai filter {key} harus angka')
+    return filters
+
+
+def playback_url(key):
+    return f'{TILE_URL}/playback/{key}/{{i}}.json'
+
+
+def lonlat_to_tile(lon, lat, z, x, y):
+    # Koordinat WGS84 ke koordinat lokal tile Web Mercator (y ke bawah)
+    n = 2 ** z
+    lat_rad = np.radians(np.clip(lat, -85.0511, 85.0511))
+    tx = (np.asarray(lon) + 180) / 360 * n
+    ty = (1 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2 * n
+    return (tx - x) * EXTENT, (ty - y) * EXTENT
+
+
+def tile_bounds(z, x, y, buffer=0):
+    # Batas tile (lon_min, lat_min, lon_max, lat_max), buffer dalam satuan extent
+    n = 2 ** z
+    pad = buffer / EXTENT
+
+    def lon(tx):
+        return tx / n * 360 - 180
+
+    def lat(ty):
+        return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * ty / n))))
+
+    return lon(x - pad), lat(y + 1 + pad), lon(x + 1 + pad), lat(y - pad)
+
+
+@lru_cache(maxsize=2)
+def event_frame(path, version):
+    # Kolom yang dikirim di tile, dihitung sekali per versi katalog
+    gdf = load_catalog(path)
+    mag_min, mag_max = gdf['mag'].min(), gdf['mag'].max()
+    return {
+        'lon': gdf['longitude'].to_numpy(),
+        'lat': gdf['latitude'].to_numpy(),
+        'mag': gdf['mag'].to_numpy(),
+        'depth': gdf['depth'].to_numpy(),
+        'year': gdf['year'].to_numpy(),
+        'epoch_ms': gdf['epoch_ms'].to_numpy(),
+        'place': gdf['place'].to_numpy(),
+        'color': depth_colors(gdf['depth'].to_numpy()),
+        'radius': marker_radius(gdf['mag'].to_numpy(), mag_min, mag_max),
+        # Jarak ke patahan/megathrust (popup dan filter jarak di browser)
+        **{col: gdf[col].to_numpy(dtype=float) for col in FAULT_DISTANCE_COLUMNS.values()},
+        **{f'{key}_name': gdf[f'{key}_name'].astype(str).to_numpy() for key in FAULT_LAYERS},
+        # 1 = gempa utama (filter "hanya gempa utama" di browser)
+        'mainshock': (load_declustering(path, gdf)['kind'] == 'mainshock').to_numpy(),
+        'index': EventIndex.from_frame(gdf),
+    }
+
+
+def event_tile(region, z, x, y, filters=None):
+    path = region_catalog(region)
+    frame = event_frame(path, catalog_version(path))
+    lon, lat = frame['lon'], frame['lat']
+    idx = frame['index'].query_bbox(*tile_bounds(z, x, y, BUFFER))
+    # Filter dulu, baru dibatasi; jarak NaN (tanpa data patahan) tidak lolos filter rentang
+    for key, value in (filters or {}).items():
+        values = frame[key][idx]
+        idx = idx[(values >= value[0]) & (values <= value[1]) if isinstance(value, list) else values == value]
+    if len(idx) > MAX_TILE_FEATURES:
+        idx = idx[np.argsort(-frame['mag'][idx], kind='stable')[:MAX_TILE_FEATURES]]
+
+    px, py = lonlat_to_tile(lon[idx], lat[idx], z, x, y)
+    features = [
+        {
+            'geometry': point,
+            'properties': {
+                'mag': float(frame['mag'][i]),
+                'depth': float(frame['depth'][i]),
+                'year': int(frame['year'][i]),
+                'epoch_ms': int(frame['epoch_ms'][i]),
+                'place': str(frame['place'][i]),
+                'lat': float(lat[i]),
+                'lon': float(lon[i]),
+                'color': str(frame['color'][i]),
+                'radius': int(frame['radius'][i]),
+                **{col: round(float(frame[col][i]), 1) for col in FAULT_DISTANCE_COLUMNS.values()},
+                **{f'{key}_name': str(frame[f'{key}_name'][i]) for key in FAULT_LAYERS},
+                'mainshock': int(frame['mainshock'][i]),
+            },
+        }
+        for i, point in zip(idx, shapely.points(px, py))
+    ]
+    return mapbox_vector_tile.encode(
+        [{'name': 'events', 'features': features}],
+        default_options={'y_coord_down': True, 'extents': EXTENT}
+    )
+
+
+@lru_cache(maxsize=None)
+def overlay_index(key):
+    frame = load_overlay_frame(key)
+    return frame, shapely.STRtree(frame.geometry.values)
+
+
+def overlay_tile(key, z, x, y):
+    frame, tree = overlay_index(key)
+    bounds = tile_bounds(z, x, y, BUFFER)
+    idx = tree.query(shapely.box(*bounds))
+
+    def to_tile(coords):
+        return np.column_stack(lonlat_to_tile(coords[:, 0], coords[:, 1], z, x, y))
+
+    geoms = shapely.transform(frame.geometry.values[idx], to_tile)
+    geoms = shapely.clip_by_rect(geoms, -BUFFER, -BUFFER, EXTENT + BUFFER, EXTENT + BUFFER)
+    fields = OVERLAYS[key]['fields']
+    features = [
+        {'geometry': geom, 'properties': {f: str(frame[f].iat[i]) for f in fields}}
+        for i, geom in zip(idx, geoms) if not geom.is_empty
+    ]
+    return mapbox_vector_tile.encode(
+        [{'name': key, 'features': features}],
+        default_options={'y_coord_down': True, 'extents': EXTENT}
+    )
+
+
+@lru_cache(maxsize=None)
+def overlay_version(key):
+    return file_hash(OVERLAYS[key]['path'])[:12]
+
+
+def tile_cache_dir(region, layer, filters=None):
+    # Tile kejadian per wilayah, versi katalog, versi label declustering dan filter;
+    # tile overlay dipakai bersama semua wilayah
+    if layer == 'events':
+        version = f'{catalog_version(region_catalog(region))}-{label_version()}'
+        return os.path.join(TILE_CACHE_DIR, region, layer, version, filter_key(filters))
+    return os.path.join(TILE_CACHE_DIR, layer, overlay_version(layer))
+
+
+def prune_tile_cache(base, layer):
+    # Dipanggil saat folder tile baru dibuat: folder versi data lama dihapus (seperti label
+    # declustering) dan folder filter di luar MAX_CACHED_FILTERS terakhir dipakai dibuang
+    version_dir = os.path.dirname(base) if layer == 'events' else base
+    parent = os.path.dirname(version_dir)
+    for name in os.listdir(parent):
+        if name != os.path.basename(version_dir):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+    if layer == 'events':
+        dirs = [os.path.join(version_dir, name) for name in os.listdir(version_dir)]
+        dirs.sort(key=lambda d: os.stat(d).st_mtime_ns, reverse=True)
+        for old in dirs[MAX_CACHED_FILTERS:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def get_tile(region, layer, z, x, y, filters=None):
+    # Tile dibuat saat diminta lalu disimpan di disk per versi data
+    base = tile_cache_dir(region, layer, filters)
+    path = os.path.join(base, str(z), str(x), f'{y}.pbf')
+    if os.path.exists(path):
+        # mtime folder filter = terakhir dipakai (urutan penghapusan prune_tile_cache)
+        with suppress(OSError):
+            os.utime(base)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    data = event_tile(region, z, x, y, filters) if layer == 'events' else overlay_tile(layer, z, x, y)
+    try:
+        is_new = not os.path.isdir(base)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if is_new:
+            prune_tile_cache(base, layer)
+        with atomic_path(path) as tmp, open(tmp, 'wb') as f:
+            f.write(data)
+    except OSError:
+        # Folder cache tidak bisa ditulis (atau baru saja dibuang), tile tetap dikirim
+        pass
+    return data
+
+
+TILE_LAYERS = ['events'] + list(OVERLAYS)
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        match = PLAYBACK_PATH.match(path)
+        if match:
+            data = playback_frame(match.group('key'), int(match.group('frame')))
+            if data is None:
+                self.send_error(404)
+                return
+            self.send_data(data, 'application/json', 'no-cache')
+            return
+
+        match = TILE_PATH.match(path)
+        if not match or match.group('layer') not in TILE_LAYERS or match.group('region') not in REGIONS:
+            self.send_error(404)
+            return
+        z, x, y = (int(match.group(k)) for k in ('z', 'x', 'y'))
+        if z > MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            self.send_error(404)
+            return
+
+        try:
+            filters = parse_filters(url.query) if match.group('layer') == 'events' else None
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+
+        data = get_tile(match.group('region'), match.group('layer'), z, x, y, filters)
+        self.send_data(data, 'application/x-protobuf', 'public, max-age=3600')
+
+    def send_data(self, data, content_type, cache_control):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        # Peta dibuka dari origin Streamlit, jadi izinkan CORS
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', cache_control)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_tile_server(host=TILE_HOST, port=TILE_PORT):
+    # Jalankan server di thread latar; jika port sudah dipakai anggap server sudah jalan
+    try:
+        server = ThreadingHTTPServer((host, port), TileHandler)
+    except OSError:
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server tile vektor katalog gempa")
+    parser.add_argument('--host', default=TILE_HOST)
+    parser.add_argument('--port', type=int, default=TILE_PORT)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), TileHandler)
+    print(f"Tile server berjalan di http://{args.host}:{args.port}/tiles/<wilayah>/<layer>/<z>/<x>/<y>.pbf")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()